@@ -40,7 +40,16 @@ if noise_scale is None:
 
 print(f"[Python] Generating TTS with model: {model_name}, speaker: {speaker}, length_scale: {length_scale}, noise_scale: {noise_scale}")
 
+# HOST PROFILE: Kalibre edilmiş thread ayarları (host_calibration.py) - model yüklenmeden önce
+from host_profile import apply_torch_threads
+apply_torch_threads("coqui")
+
 tts = TTS(model_name)
+
+# CPU-ONLY: int8 / ONNX çıkarım modu (TTS_CPU_INFERENCE veya ses başına benchmark önerisi)
+from tts_cpu_inference import resolve_cpu_mode, apply_cpu_mode, voice_key
+cpu_mode = apply_cpu_mode(tts, model_name, resolve_cpu_mode(model_name, voice_key(speaker=speaker)))
+print(f"[Python] CPU inference mode: {cpu_mode}")
 tts.tts_to_file(
     text=text, 
     file_path=output_path, 
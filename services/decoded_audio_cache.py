@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Decoded Audio Cache (16 kHz mono float32, memory-mapped)
+faster_whisper_transcribe.py aynı WAV için birden çok kez çağrılır (word timing, getWordTimings, fallback'ler)
+Her çağrı PyAV ile decode + 16 kHz resample yapıyordu - bu modül sonucu BIR KEZ diske yazar:
+  - Anahtar: sha1(mutlak yol + mtime_ns + boyut) -> dosya değişince cache otomatik geçersiz
+  - Dosya: temp/audio_cache/<anahtar>.f32 (ham float32, atomik yazım)
+  - Okuma: np.memmap mode='c' (copy-on-write) - modele kopyasız, yazılabilir görünüm verilir
+Toplam boyut AUDIO_CACHE_MAX_MB'ı aşarsa en eski kullanılan girdiler silinir
+AUDIO_CACHE=off ile devre dışı bırakılabilir
+
+Kullanım:
+  python decoded_audio_cache.py warm <audio> [...]
+  python decoded_audio_cache.py vad <audio>
+  python decoded_audio_cache.py prune
+"""
+import os
+import sys
+import io
+import json
+import hashlib
+import argparse
+
+import numpy as np
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+SAMPLE_RATE = 16000  # faster-whisper FeatureExtractor / Silero VAD giriş hızı
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "temp", "audio_cache")
+CACHE_EXTENSION = ".f32"
+DEFAULT_MAX_MB = 512
+
+
+def log(message):
+    # stdout JSON çıktısı veren runner'ları bozmamak için stderr
+    print(f"[Audio Cache] {message}", file=sys.stderr)
+
+
+def cache_enabled():
+    return os.environ.get("AUDIO_CACHE", "").lower() not in ("off", "false", "0")
+
+
+def cache_key(audio_path):
+    stat = os.stat(audio_path)
+    source = f"{os.path.abspath(audio_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def cache_path(audio_path, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, cache_key(audio_path) + CACHE_EXTENSION)
+
+
+def decode(audio_path):
+    """PyAV decode + 16 kHz mono resample (faster-whisper'ın kendi yolu)"""
+    from faster_whisper.audio import decode_audio
+    return decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+
+def open_cached(path):
+    """Cache dosyasını copy-on-write memmap olarak aç (boş dosya memmap'lenemez)"""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="c")
+
+
+def store(path, audio):
+    """Atomik yazım: yarım kalan dosya asla cache girdisi olarak görünmez"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        np.ascontiguousarray(audio, dtype=np.float32).tofile(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_audio(audio_path, cache_dir=CACHE_DIR):
+    """
+    16 kHz mono float32 ses - cache'te varsa decode/resample tamamen atlanır
+    Returns: np.memmap (cache) veya np.ndarray (cache kapalı/yazılamıyor)
+    """
+    if not cache_enabled():
+        return decode(audio_path)
+
+    path = cache_path(audio_path, cache_dir)
+    if os.path.exists(path):
+        try:
+            os.utime(path)  # LRU budaması için son kullanım
+            audio = open_cached(path)
+            log(f"Hit: {os.path.basename(audio_path)} ({len(audio) / SAMPLE_RATE:.1f}s)")
+            return audio
+        except Exception as e:
+            log(f"WARNING: Unreadable cache entry, decoding again: {e}")
+
+    audio = decode(audio_path)
+    try:
+        store(path, audio)
+        prune(cache_dir)
+        log(f"Stored: {os.path.basename(audio_path)} ({len(audio) / SAMPLE_RATE:.1f}s)")
+        return open_cached(path)
+    except Exception as e:
+        log(f"WARNING: Could not write cache entry: {e}")
+        return audio
+
+
+def prune(cache_dir=CACHE_DIR, max_mb=None):
+    """Toplam boyut limiti aşıldıysa en eski kullanılan girdileri sil. Returns: silinen dosya sayısı"""
+    if max_mb is None:
+        max_mb = float(os.environ.get("AUDIO_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_EXTENSION):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    limit = max_mb * 1024 * 1024
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # Windows: başka süreç memmap'li tutuyor olabilir
+        total -= size
+        removed += 1
+    return removed
+
+
+def speech_segments(audio_path, threshold=0.5, min_silence_duration_ms=300, speech_pad_ms=200):
+    """
+    Sadece VAD geçişi (model yüklemeden): cache'teki sesten konuşma aralıkları
+    Returns: [{"start": sn, "end": sn}, ...]
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    audio = load_audio(audio_path)
+    options = VadOptions(
+        threshold=threshold,
+        min_silence_duration_ms=min_silence_duration_ms,
+        speech_pad_ms=speech_pad_ms,
+    )
+    return [
+        {"start": round(s["start"] / SAMPLE_RATE, 3), "end": round(s["end"] / SAMPLE_RATE, 3)}
+        for s in get_speech_timestamps(audio, options)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decoded 16 kHz audio cache for faster-whisper passes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm", help="Decode files into the cache")
+    warm.add_argument("audio", nargs="+")
+    vad = sub.add_parser("vad", help="Speech segments (VAD only, no Whisper model)")
+    vad.add_argument("audio")
+    sub.add_parser("prune", help="Enforce AUDIO_CACHE_MAX_MB")
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        result = {path: round(len(load_audio(path)) / SAMPLE_RATE, 3) for path in args.audio}
+    elif args.command == "vad":
+        result = {"success": True, "segments": speech_segments(args.audio)}
+    else:
+        result = {"removed": prune()}
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,20 +21,22 @@ def cleanup_memory():
         pass
 
 # MEMORY-OPTIMIZED: Import inside function to delay memory allocation
-def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="int8", language=None):
+def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="int8", language=None, script_text=None):
     """
     Transcribe audio using Faster-Whisper and return word-level timestamps
     
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to audio file, or a *.pcm.json descriptor from pcm_handoff.py (in-memory PCM)
         model_size: Whisper model size (tiny, base, small, medium, large)
         device: Device to use (cpu, cuda)
         compute_type: Compute type (int8, int8_float16, float16, float32)
         language: Language code (e.g., 'en', 'tr', 'es') or None for auto-detection
+        script_text: Known script - if given, words are reconciled against it in the same pass
     
     Returns:
         List of word-level timestamps with start, end, and word text
     """
+    handoff_handle = None
     try:
         # MEMORY-OPTIMIZED: Clean memory before loading model
         cleanup_memory()
@@ -66,14 +68,16 @@ def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="
             pass  # psutil not available, continue with requested model
         
         # CRITICAL: download_root parameter for offline mode
-        # MEMORY-OPTIMIZED: Use cpu_threads=4 to limit memory usage
+        # MEMORY-OPTIMIZED: Default cpu_threads=4, host profile (host_calibration.py) overrides it
+        from host_profile import get_cpu_threads
+        cpu_threads = get_cpu_threads("whisper", 4)
         model = WhisperModel(
             model_size, 
             device=device, 
             compute_type=compute_type,
             download_root=cache_dir,  # Use local cache
             local_files_only=False,  # Try local first, download if needed
-            cpu_threads=4  # MEMORY-OPTIMIZED: Limit CPU threads
+            cpu_threads=cpu_threads
         )
         
         # Transcribe with word-level timestamps
@@ -91,6 +95,15 @@ def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="
         lang_display = language_names.get(language, language or 'Auto-detect')
         print(f"🌍 [Faster-Whisper] Target language: {lang_display}", file=sys.stderr)
         
+        # PCM HANDOFF: Sentezlenen ses paylaşılan bellekten, WAV encode/decode olmadan
+        # DECODED AUDIO CACHE: Dosyalar için 16 kHz float32 memmap - tekrar geçişlerde decode/resample yok
+        from pcm_handoff import is_descriptor_path, load_for_whisper
+        if is_descriptor_path(audio_path):
+            audio, handoff_handle = load_for_whisper(audio_path)
+        else:
+            from decoded_audio_cache import load_audio
+            audio = load_audio(audio_path)
+        
         # PROFESSIONAL: Retry mechanism for network issues
         max_retries = 3
         retry_delay = 2
@@ -103,7 +116,7 @@ def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="
                 # HIGH QUALITY SETTINGS for best transcription accuracy
                 # These settings work well for both English AND non-English languages
                 segments, info = model.transcribe(
-                    audio_path,
+                    audio,  # Decode edilmiş dizi (kopyasız memmap görünümü)
                     word_timestamps=True,  # CRITICAL: Enable word-level timestamps
                     language=language,  # None = auto-detect, or specific language code
                     beam_size=5,  # Higher = more accurate (but slower)
@@ -149,13 +162,30 @@ def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="
         
         print(f"✅ [Faster-Whisper] Extracted {len(words)} word-level timestamps", file=sys.stderr)
         
-        # Return as JSON
-        return json.dumps({
+        # Paylaşılan belleğe açık view kalmamalı (shared memory close() BufferError verir)
+        del segments, audio
+        
+        result = {
             "success": True,
             "words": words,
             "language": info.language,
             "language_probability": info.language_probability
-        })
+        }
+        
+        # SCRIPT RECONCILIATION: Script kelimeleriyle birebir, monoton zamanlamalar (aynı çağrıda)
+        if script_text:
+            try:
+                from script_alignment import reconcile
+                aligned_words, alignment_stats = reconcile(script_text, words, audio_duration=info.duration)
+                result["aligned_words"] = aligned_words
+                result["alignment"] = alignment_stats
+                print(f"✅ [Faster-Whisper] Reconciled {alignment_stats['script_words']} script words "
+                      f"(exact: {alignment_stats['exact']}, interpolated: {alignment_stats['interpolated']})", file=sys.stderr)
+            except Exception as align_error:
+                print(f"⚠️ [Faster-Whisper] Script reconciliation failed: {align_error}", file=sys.stderr)
+        
+        # Return as JSON
+        return json.dumps(result)
         
     except Exception as e:
         error_msg = str(e)
@@ -170,12 +200,17 @@ def transcribe_audio(audio_path, model_size="base", device="cpu", compute_type="
     finally:
         # MEMORY-OPTIMIZED: Always clean up after transcription
         cleanup_memory()
+        if handoff_handle is not None:
+            try:
+                handoff_handle.close()
+            except BufferError:
+                pass  # Hata yolunda view hâlâ referanslı - süreç çıkışında kapanır
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({
             "success": False,
-            "error": "Usage: python faster_whisper_transcribe.py <audio_path> [model_size] [device] [compute_type] [language]",
+            "error": "Usage: python faster_whisper_transcribe.py <audio_path> [model_size] [device] [compute_type] [language] [script_path]",
             "words": []
         }))
         sys.exit(1)
@@ -189,6 +224,13 @@ if __name__ == "__main__":
     if language == "None" or language == "":
         language = None
     
+    # Optional: known script (UTF-8 text file) for same-pass reconciliation
+    script_text = None
+    script_path = sys.argv[6] if len(sys.argv) > 6 else None
+    if script_path and os.path.exists(script_path):
+        with open(script_path, 'r', encoding='utf-8') as f:
+            script_text = f.read()
+    
     if not os.path.exists(audio_path):
         print(json.dumps({
             "success": False,
@@ -197,6 +239,6 @@ if __name__ == "__main__":
         }))
         sys.exit(1)
     
-    result = transcribe_audio(audio_path, model_size, device, compute_type, language)
+    result = transcribe_audio(audio_path, model_size, device, compute_type, language, script_text)
     print(result)
 
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Host Calibration - thread sayısı ve paralel job kalibrasyonu
+Her runner'ı (whisper, xtts, coqui) farklı thread / eşzamanlılık kombinasyonlarında ölçer
+ve makineye özel profili models/host_profiles/<hostname>.json dosyasına yazar
+Runner'lar bu profili otomatik yükler (host_profile.py)
+Donanım değişince tekrar çalıştırın - mevcut profil güncellenir
+
+Kullanım:
+  python host_calibration.py                      # Tüm runner'lar
+  python host_calibration.py whisper xtts --iterations 3 --max-concurrency 4
+"""
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime, timezone
+
+from host_profile import PROFILE_DIR, hardware_signature, profile_path
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+VOICE_SAMPLES_DIR = os.path.join(PROJECT_DIR, "voice_samples")
+
+RUNNERS = ("whisper", "xtts", "coqui")
+
+# Worker başına yaklaşık bellek ihtiyacı (GB) - eşzamanlılık üst sınırı için
+RUNNER_MEMORY_GB = {"whisper": 1.0, "xtts": 3.0, "coqui": 0.6}
+
+CALIBRATION_TEXT = (
+    "These armies weren't just massive, they were unstoppable forces that reshaped the world, "
+    "marching for centuries across three continents."
+)
+
+READY_MARKER = "CALIBRATION_READY"
+RESULT_MARKER = "CALIBRATION_RESULT"
+
+
+def log(message):
+    print(f"[Host Calibration] {message}")
+
+
+# -------------------------
+# Worker: modeli yükle, hazır olduğunu bildir, GO bekle, iş yükünü ölç
+# -------------------------
+def load_workload(runner, threads, args):
+    """Runner'ın üretimdeki çağrısına denk iş yükü döner (callable)"""
+    if runner == "whisper":
+        from faster_whisper import WhisperModel
+        cache_dir = os.path.join(PROJECT_DIR, "models", "faster-whisper")
+        model = WhisperModel(args.whisper_model, device="cpu", compute_type="int8",
+                             download_root=cache_dir, cpu_threads=threads)
+
+        def run():
+            segments, _ = model.transcribe(args.audio, word_timestamps=True, beam_size=5,
+                                           language=args.language, vad_filter=True)
+            for segment in segments:
+                pass  # Generator'ı tüket - asıl çıkarım burada yapılır
+        return run
+
+    from TTS.api import TTS
+    from tts_cpu_inference import apply_cpu_mode, resolve_cpu_mode, voice_key
+
+    if runner == "xtts":
+        model_name = "tts_models/multilingual/multi-dataset/xtts_v2"
+        tts = TTS(model_name=model_name, gpu=False)
+        apply_cpu_mode(tts, model_name, resolve_cpu_mode(model_name, voice_key(speaker_wav=args.speaker_wav)))
+        return lambda: tts.tts(text=CALIBRATION_TEXT, speaker_wav=args.speaker_wav,
+                               language=args.language, split_sentences=False)
+
+    model_name = "tts_models/en/vctk/vits"
+    tts = TTS(model_name)
+    apply_cpu_mode(tts, model_name, resolve_cpu_mode(model_name, voice_key(speaker=args.speaker)))
+    return lambda: tts.tts(text=CALIBRATION_TEXT, speaker=args.speaker)
+
+
+def worker_main(args):
+    if args.runner != "whisper":
+        import torch
+        torch.set_num_threads(args.threads)
+        if args.interop:
+            torch.set_num_interop_threads(args.interop)
+
+    start = time.perf_counter()
+    workload = load_workload(args.runner, args.threads, args)
+    workload()  # Warm-up
+    load_seconds = time.perf_counter() - start
+
+    # Barrier: tüm worker'lar hazır olunca koordinatör GO gönderir
+    print(READY_MARKER, flush=True)
+    sys.stdin.readline()
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        workload()
+    run_seconds = time.perf_counter() - start
+
+    print(f"{RESULT_MARKER} " + json.dumps({
+        "load_seconds": load_seconds,
+        "run_seconds": run_seconds,
+        "iterations": args.iterations,
+    }), flush=True)
+
+
+# -------------------------
+# Koordinatör
+# -------------------------
+def thread_candidates(cores):
+    values = {cores}
+    t = 1
+    while t < cores:
+        values.add(t)
+        t *= 2
+    return sorted(values)
+
+
+def available_memory_gb():
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 ** 3)
+    except ImportError:
+        return None
+
+
+def build_grid(runner, cores, max_concurrency):
+    """
+    (threads, concurrency) kombinasyonları
+    concurrency=1 için tüm thread değerleri; c>1 için makinenin en az yarısını kullanan
+    ve aşırı abonelik yapmayan (threads * c <= cores) kombinasyonlar
+    """
+    memory = available_memory_gb()
+    if memory is not None:
+        max_concurrency = min(max_concurrency, max(1, int(memory // RUNNER_MEMORY_GB[runner])))
+
+    grid = [(t, 1) for t in thread_candidates(cores)]
+    c = 2
+    while c <= max_concurrency:
+        grid.extend((t, c) for t in thread_candidates(cores) if cores / 2 <= t * c <= cores)
+        c *= 2
+    return grid
+
+
+def worker_command(runner, threads, interop, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", runner,
+        "--threads", str(threads), "--iterations", str(args.iterations),
+        "--language", args.language, "--speaker", args.speaker,
+        "--whisper-model", args.whisper_model,
+    ]
+    if interop:
+        command += ["--interop", str(interop)]
+    if args.audio:
+        command += ["--audio", args.audio]
+    if args.speaker_wav:
+        command += ["--speaker-wav", args.speaker_wav]
+    return command
+
+
+def measure(runner, threads, concurrency, interop, args):
+    """concurrency adet worker'ı aynı anda koştur; throughput (job/dakika) ve job süresi döner"""
+    env = {
+        **os.environ,
+        "OMP_NUM_THREADS": str(threads),
+        "MKL_NUM_THREADS": str(threads),
+        "HOST_PROFILE": "off",  # Eski profil ölçümü etkilemesin
+        "PYTHONUNBUFFERED": "1",
+    }
+    command = worker_command(runner, threads, interop, args)
+    processes = [
+        subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         env=env, text=True, encoding="utf-8", errors="replace")
+        for _ in range(concurrency)
+    ]
+
+    try:
+        for process in processes:
+            for line in process.stdout:
+                if line.strip() == READY_MARKER:
+                    break
+            else:
+                raise RuntimeError(f"worker exited before ready (code {process.wait()})")
+
+        for process in processes:
+            process.stdin.write("GO\n")
+            process.stdin.flush()
+
+        results = []
+        for process in processes:
+            for line in process.stdout:
+                if line.startswith(RESULT_MARKER):
+                    results.append(json.loads(line[len(RESULT_MARKER):]))
+            process.wait()
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+    if len(results) != concurrency:
+        raise RuntimeError("worker did not report a result")
+
+    wall_seconds = max(r["run_seconds"] for r in results)
+    jobs = sum(r["iterations"] for r in results)
+    return {
+        "threads": threads,
+        "concurrency": concurrency,
+        "interop_threads": interop,
+        "throughput_jobs_per_min": round(60.0 * jobs / wall_seconds, 3),
+        "latency_seconds": round(sum(r["run_seconds"] / r["iterations"] for r in results) / len(results), 3),
+        "load_seconds": round(max(r["load_seconds"] for r in results), 2),
+    }
+
+
+def calibrate_runner(runner, args, cores):
+    results = []
+    for threads, concurrency in build_grid(runner, cores, args.max_concurrency):
+        log(f"{runner}: threads={threads} x jobs={concurrency}...")
+        try:
+            result = measure(runner, threads, concurrency, None, args)
+        except Exception as e:
+            log(f"   FAILED: {e}")
+            continue
+        results.append(result)
+        log(f"   {result['throughput_jobs_per_min']:.2f} jobs/min, {result['latency_seconds']:.2f}s/job")
+
+    if not results:
+        return None
+
+    best = max(results, key=lambda r: r["throughput_jobs_per_min"])
+
+    # Inter-op: yalnızca torch runner'ları - en iyi noktada dene
+    if runner != "whisper":
+        for interop in (1, 2):
+            if interop > best["threads"]:
+                continue
+            log(f"{runner}: threads={best['threads']} x jobs={best['concurrency']}, interop={interop}...")
+            try:
+                result = measure(runner, best["threads"], best["concurrency"], interop, args)
+            except Exception as e:
+                log(f"   FAILED: {e}")
+                continue
+            results.append(result)
+            log(f"   {result['throughput_jobs_per_min']:.2f} jobs/min")
+            if result["throughput_jobs_per_min"] > best["throughput_jobs_per_min"]:
+                best = result
+
+    return {
+        "threads": best["threads"],
+        "interop_threads": best["interop_threads"],
+        "parallel_jobs": best["concurrency"],
+        "throughput_jobs_per_min": best["throughput_jobs_per_min"],
+        "latency_seconds": best["latency_seconds"],
+        "results": results,
+    }
+
+
+def default_speaker_wav():
+    preferred = os.path.join(VOICE_SAMPLES_DIR, "narrator_sample_2.wav")
+    if os.path.exists(preferred):
+        return preferred
+    if os.path.isdir(VOICE_SAMPLES_DIR):
+        wavs = sorted(f for f in os.listdir(VOICE_SAMPLES_DIR) if f.endswith(".wav"))
+        if wavs:
+            return os.path.join(VOICE_SAMPLES_DIR, wavs[0])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark runners and write the per-host performance profile")
+    parser.add_argument("runners", nargs="*", help=f"Runners to calibrate ({', '.join(RUNNERS)}; default: all)")
+    parser.add_argument("--iterations", type=int, default=2, help="Timed jobs per worker")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--audio", default=None, help="Whisper test audio (default: --speaker-wav)")
+    parser.add_argument("--speaker-wav", default=None, help="XTTS reference voice (default: voice_samples/)")
+    parser.add_argument("--speaker", default="p230", help="VITS speaker ID")
+    parser.add_argument("--whisper-model", default=os.environ.get("WHISPER_MODEL_SIZE", "small"))
+    parser.add_argument("--worker", choices=RUNNERS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--threads", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--interop", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.runner = args.worker
+        worker_main(args)
+        return
+
+    args.speaker_wav = args.speaker_wav or default_speaker_wav()
+    args.audio = args.audio or args.speaker_wav
+
+    runners = list(dict.fromkeys(args.runners or RUNNERS))
+    unknown = [r for r in runners if r not in RUNNERS]
+    if unknown:
+        parser.error(f"unknown runner(s): {', '.join(unknown)}")
+    if "xtts" in runners and not args.speaker_wav:
+        log("WARNING: No speaker WAV found for xtts (use --speaker-wav), skipping")
+        runners.remove("xtts")
+    if "whisper" in runners and not args.audio:
+        log("WARNING: No audio found for whisper (use --audio), skipping")
+        runners.remove("whisper")
+
+    cores = os.cpu_count() or 1
+    hardware = hardware_signature()
+    log(f"Host: {hardware['cpu_model']} ({cores} logical cores)")
+
+    # Mevcut profil: aynı donanımsa diğer runner'ların sonuçları korunur
+    path = profile_path()
+    profile = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except Exception:
+            profile = {}
+    if profile.get("hardware") != hardware:
+        profile = {"runners": {}}
+
+    for runner in runners:
+        settings = calibrate_runner(runner, args, cores)
+        if settings is None:
+            log(f"WARNING: All {runner} measurements failed, profile not updated for it")
+            continue
+        profile["runners"][runner] = settings
+
+    profile["hostname"] = os.path.splitext(os.path.basename(path))[0]
+    profile["hardware"] = hardware
+    profile["calibrated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    print(f"\n{'='*60}")
+    print(f"{'Runner':<10}{'Threads':>9}{'Interop':>9}{'Jobs':>6}{'Jobs/min':>11}{'s/job':>9}")
+    print(f"{'-'*60}")
+    for runner, s in profile["runners"].items():
+        print(f"{runner:<10}{s['threads']:>9}{str(s['interop_threads'] or '-'):>9}{s['parallel_jobs']:>6}"
+              f"{s['throughput_jobs_per_min']:>11.2f}{s['latency_seconds']:>9.2f}")
+    print(f"{'='*60}")
+    print(f"Profile saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
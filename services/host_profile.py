@@ -0,0 +1,125 @@
+"""
+Host Performance Profile Loader
+host_calibration.py'nin yazdığı makineye özel profili okur ve runner'lara uygular:
+  - threads:         Job başına en iyi intra-op thread sayısı
+  - interop_threads: torch inter-op thread sayısı
+  - parallel_jobs:   Aynı anda çalıştırılması önerilen job sayısı
+Donanım değiştiyse (CPU sayısı/modeli) profil yok sayılır - kalibrasyonu tekrar çalıştırın
+HOST_PROFILE=off ile devre dışı bırakılabilir
+"""
+import os
+import sys
+import json
+import socket
+import platform
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "host_profiles")
+
+_cached_profile = None
+
+
+def log(message):
+    # stdout JSON çıktısı veren runner'ları (faster_whisper_transcribe.py) bozmamak için stderr
+    print(f"[Host Profile] {message}", file=sys.stderr)
+
+
+def profile_path(hostname=None):
+    return os.path.join(PROFILE_DIR, f"{hostname or socket.gethostname()}.json")
+
+
+def cpu_model_name():
+    """CPU model adı (Linux: /proc/cpuinfo, diğerleri: platform.processor)"""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def hardware_signature():
+    return {
+        "cpu_count": os.cpu_count(),
+        "cpu_model": cpu_model_name(),
+        "machine": platform.machine(),
+    }
+
+
+def load_host_profile():
+    """Bu makinenin profili - yoksa, devre dışıysa veya donanım değiştiyse None"""
+    global _cached_profile
+    if _cached_profile is not None:
+        return _cached_profile or None
+
+    _cached_profile = {}
+    if os.environ.get("HOST_PROFILE", "").lower() in ("off", "false", "0"):
+        return None
+
+    path = profile_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except Exception as e:
+        log(f"WARNING: Could not read {path}: {e}")
+        return None
+
+    if profile.get("hardware") != hardware_signature():
+        log("WARNING: Hardware changed since calibration, ignoring profile (re-run host_calibration.py)")
+        return None
+
+    _cached_profile = profile
+    return profile
+
+
+def get_runner_settings(runner):
+    """{"threads", "interop_threads", "parallel_jobs"} veya {} (profil yoksa)"""
+    profile = load_host_profile()
+    if not profile:
+        return {}
+    return profile.get("runners", {}).get(runner, {})
+
+
+def get_cpu_threads(runner, default):
+    return get_runner_settings(runner).get("threads", default)
+
+
+def get_parallel_jobs(runner, default=1):
+    return get_runner_settings(runner).get("parallel_jobs", default)
+
+
+def apply_torch_threads(runner):
+    """
+    Profildeki thread ayarlarını torch'a uygula - model yüklenmeden ÖNCE çağrılmalı
+    (set_num_interop_threads ilk paralel işten sonra çağrılamaz)
+    Returns: Uygulanan intra-op thread sayısı veya None
+    """
+    settings = get_runner_settings(runner)
+    if not settings:
+        return None
+
+    import torch
+
+    threads = settings.get("threads")
+    interop_threads = settings.get("interop_threads")
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass  # Inter-op pool zaten başlamış - intra-op ayarı yine de geçerli
+    log(f"{runner}: threads={threads}, interop={interop_threads}, parallel_jobs={settings.get('parallel_jobs')}")
+    return threads
+
+
+if __name__ == "__main__":
+    print(json.dumps({
+        "path": profile_path(),
+        "hardware": hardware_signature(),
+        "profile": load_host_profile(),
+    }, indent=2, ensure_ascii=False))
@@ -30,6 +30,15 @@ class IntelligentMusicService {
     // Normalization target for final audio processing
     this.targetLUFS = process.env.MUSIC_TARGET_LUFS || -14; // prefer -14 LUFS for Shorts
     this.defaultFade = 2; // seconds
+
+    // Precomputed analysis index (music_index.py): LUFS / true peak / BPM / energy per cached track
+    this.musicIndexPath = path.join(this.cacheDir, 'music_index.json');
+    // Search context of downloaded tracks (mood/query) - the audio index cannot know it
+    this.musicTagsPath = path.join(this.cacheDir, 'music_tags.json');
+    this.musicIndexScript = path.join(__dirname, 'music_index.py');
+    this._musicIndex = null;
+    this._musicIndexMtime = 0;
+    this._musicIndexScan = null;
     console.log('✅ IntelligentMusicService initialized');
   }
 
@@ -217,12 +226,16 @@ class IntelligentMusicService {
         if (freesoundMusic) return [freesoundMusic];
       }
 
-      // 2) Pixabay enhanced - DISABLED: Pixabay API returns images, not music!
+      // 2) Already-analyzed tracks in the local cache (music_index.json)
+      const indexed = await this.fetchFromMusicIndex(mood, energy, genre, duration);
+      if (indexed) return [indexed];
+
+      // 3) Pixabay enhanced - DISABLED: Pixabay API returns images, not music!
       // const pix = await this.fetchFromPixabayEnhanced(mood, energy, genre, duration);
       // if (pix) return [pix];
 
-      // 3) Mixkit placeholder (if you integrate a scraper or API)
-      // 4) YoutubeAudioLibrary fallback (curated list in your repo)
+      // 4) Mixkit placeholder (if you integrate a scraper or API)
+      // 5) YoutubeAudioLibrary fallback (curated list in your repo)
       const curated = await this.fetchFromCuratedDatabase(mood, energy, genre, duration);
       if (curated) return [curated];
 
@@ -287,7 +300,9 @@ class IntelligentMusicService {
           writer.on('finish', resolve);
           writer.on('error', reject);
         });
+        this.scheduleMusicIndexScan();
       }
+      this.recordTrackTags(path.basename(outputPath), { mood, query, source: 'freesound' });
 
       return {
         id: `freesound_${chosen.id}`,
@@ -389,6 +404,133 @@ class IntelligentMusicService {
     }
   }
 
+  // -------------------------
+  // Music analysis index (services/music_index.py)
+  // Each cached track is analyzed once: integrated LUFS, true peak, BPM/beat grid, energy curve, duration
+  // -------------------------
+  getPythonCommand() {
+    const venvPython = process.platform === 'win32'
+      ? path.join(__dirname, '..', 'venv', 'Scripts', 'python.exe')
+      : path.join(__dirname, '..', 'venv', 'bin', 'python3');
+    if (fs.existsSync(venvPython)) return venvPython;
+    return process.platform === 'win32' ? 'python' : 'python3';
+  }
+
+  loadMusicIndex() {
+    try {
+      const mtime = fs.statSync(this.musicIndexPath).mtimeMs;
+      if (!this._musicIndex || mtime !== this._musicIndexMtime) {
+        this._musicIndex = JSON.parse(fs.readFileSync(this.musicIndexPath, 'utf8'));
+        this._musicIndexMtime = mtime;
+      }
+    } catch (err) {
+      this._musicIndex = null;
+    }
+    return this._musicIndex && this._musicIndex.tracks ? this._musicIndex : null;
+  }
+
+  // Index entry for a file - only if it lives in the music cache and has not changed since analysis
+  getTrackAnalysis(filePath) {
+    if (path.resolve(path.dirname(filePath)) !== path.resolve(this.cacheDir)) return null;
+    const index = this.loadMusicIndex();
+    const entry = index && index.tracks[path.basename(filePath)];
+    if (!entry) return null;
+    try {
+      const stat = fs.statSync(filePath, { bigint: true });
+      // mtime_ns is stored as a string - a 19-digit JSON number would be rounded by JSON.parse
+      if (Number(stat.size) !== entry.size || String(stat.mtimeNs) !== entry.mtime_ns) return null;
+    } catch (err) {
+      return null;
+    }
+    return entry;
+  }
+
+  loadTrackTags() {
+    try {
+      return JSON.parse(fs.readFileSync(this.musicTagsPath, 'utf8'));
+    } catch (err) {
+      return {};
+    }
+  }
+
+  // First search context wins - a track downloaded for "calm" stays a calm track
+  recordTrackTags(fileName, tags) {
+    const all = this.loadTrackTags();
+    if (all[fileName]) return;
+    all[fileName] = tags;
+    try {
+      fs.writeFileSync(this.musicTagsPath, JSON.stringify(all, null, 2), 'utf8');
+    } catch (err) {
+      console.warn('⚠️ [Music Index] Could not record track tags:', err.message);
+    }
+  }
+
+  // Incremental scan in the background - never blocks the current render
+  scheduleMusicIndexScan() {
+    if (this._musicIndexScan || !fs.existsSync(this.musicIndexScript)) return;
+    const proc = spawn(this.getPythonCommand(), [this.musicIndexScript, 'scan', '--dir', this.cacheDir], { windowsHide: true });
+    this._musicIndexScan = proc;
+    let stderr = '';
+    proc.stderr.on('data', d => stderr += d.toString());
+    proc.on('close', code => {
+      this._musicIndexScan = null;
+      if (code === 0) console.log('🎵 [Music Index] Cache analysis updated');
+      else console.warn('⚠️ [Music Index] Scan failed:', stderr.slice(-500));
+    });
+    proc.on('error', err => {
+      this._musicIndexScan = null;
+      console.warn('⚠️ [Music Index] Could not start scan:', err.message);
+    });
+  }
+
+  // Pick an analyzed cache track: only tracks whose measured energy level (tempo + loudness + energy curve)
+  // and recorded mood match the request qualify; among them the closest duration (longer preferred) wins
+  async fetchFromMusicIndex(mood, energy, genre, targetDuration) {
+    const index = this.loadMusicIndex();
+    if (!index) {
+      this.scheduleMusicIndexScan();
+      return null;
+    }
+
+    const tags = this.loadTrackTags();
+    const candidates = Object.entries(index.tracks)
+      .map(([name, entry]) => ({ name, entry, file: path.join(this.cacheDir, name) }))
+      .filter(c => c.entry.duration >= 5 && this.getTrackAnalysis(c.file))
+      .filter(c => !energy || energy === 'auto' || c.entry.energy_level === energy)
+      // Untagged tracks (e.g. copied in by hand) qualify on measured energy alone
+      .filter(c => !mood || mood === 'auto' || !tags[c.name] || !tags[c.name].mood || tags[c.name].mood === mood);
+    if (!candidates.length) {
+      console.log(`ℹ️  [Music Index] No analyzed track matches mood: ${mood}, energy: ${energy}`);
+      return null;
+    }
+
+    const score = ({ entry }) => {
+      // Shorter tracks are looped by the mixer - penalize them more than longer ones
+      return entry.duration >= targetDuration
+        ? (entry.duration - targetDuration) * 0.1
+        : (targetDuration - entry.duration);
+    };
+    const best = Math.min(...candidates.map(score));
+    const pool = candidates.filter(c => score(c) - best < 5);
+    const chosen = pool[Math.floor(Math.random() * pool.length)];
+
+    const trackDuration = Math.min(chosen.entry.duration, targetDuration);
+    console.log(`✅ [Music Index] Selected: ${chosen.name} (${chosen.entry.duration}s, ${chosen.entry.bpm || '?'} BPM, ${chosen.entry.energy_level})`);
+    const processed = await this.processMusicFile(chosen.file, trackDuration);
+    return {
+      id: `cache_${path.parse(chosen.name).name}`,
+      title: chosen.name,
+      path: processed,
+      mood,
+      energy: chosen.entry.energy_level,
+      genre,
+      duration: trackDuration,
+      bpm: chosen.entry.bpm,
+      beatOffset: chosen.entry.beat_offset,
+      source: 'music_index'
+    };
+  }
+
   // -------------------------
   // Process audio (trim, normalize to target LUFS, fade)
   // Uses ffmpeg (spawn) to avoid fluent-ffmpeg complexity
@@ -400,12 +542,21 @@ class IntelligentMusicService {
 
     // CRITICAL: Check if file is actually audio (not image/video)
     if (!fs.existsSync(inputPath)) {
-      return reject(new Error(`Input file not found: ${inputPath}`));
+      throw new Error(`Input file not found: ${inputPath}`);
     }
 
-    // Use ffmpeg loudnorm in two-pass if available; here do single-pass with target LUFS var
-    // We use -af loudnorm=I=<target>:TP=-1.0:LRA=7 for Shorts-friendly level
-    const targetI = this.targetLUFS;
+    const targetI = Number(this.targetLUFS);
+    const analysis = this.getTrackAnalysis(inputPath);
+    let levelFilter;
+    if (analysis) {
+      // Loudness already measured: single-pass static gain, limited so the true peak stays under -1 dBTP
+      const gainDb = Math.min(targetI - analysis.lufs, -1.0 - analysis.true_peak);
+      levelFilter = `volume=${gainDb.toFixed(2)}dB`;
+    } else {
+      // Not analyzed yet: single-pass loudnorm (-af loudnorm=I=<target>:TP=-1.0:LRA=7 for Shorts-friendly level)
+      levelFilter = `loudnorm=I=${targetI}:TP=-1.0:LRA=7`;
+      if (path.resolve(path.dirname(inputPath)) === path.resolve(this.cacheDir)) this.scheduleMusicIndexScan();
+    }
 
     return new Promise((resolve, reject) => {
       const args = [
@@ -413,7 +564,7 @@ class IntelligentMusicService {
         '-i', inputPath,
         '-vn', // CRITICAL: Ignore video/image streams, audio only
         '-t', String(Math.max(5, targetDuration)),
-        '-af', `loudnorm=I=${targetI}:TP=-1.0:LRA=7,afade=t=in:st=0:d=${fadeIn},afade=t=out:st=${Math.max(0,targetDuration-fadeOut)}:d=${fadeOut}`,
+        '-af', `${levelFilter},afade=t=in:st=0:d=${fadeIn},afade=t=out:st=${Math.max(0,targetDuration-fadeOut)}:d=${fadeOut}`,
         '-b:a', '192k',
         '-acodec', 'libmp3lame', // Force MP3 codec
         outPath
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Background Music Analysis Index
+Müzik cache klasörünü (temp/music_cache) BIR KEZ tarar ve her parça için saklar:
+  - Integrated LUFS, true peak, LRA (ffmpeg loudnorm ölçümü)
+  - BPM + beat grid (ilk vuruş offset'i; grid = offset + k * 60 / bpm)
+  - Enerji eğrisi (0.5 sn RMS, uint8 quantize, base64)
+  - Enerji sınıfı (low/medium/high): tempo + ölçülen loudness + enerji eğrisinin sürekliliği
+  - Süre
+Index artımlıdır: yalnızca yeni/değişen dosyalar analiz edilir, silinenler çıkarılır
+Node (intelligentMusicService.js) bu değerlerle loudnorm yerine tek geçişli gain uygular
+
+Kullanım:
+  python music_index.py [scan] [--dir temp/music_cache] [--force]
+  python music_index.py get <file>
+"""
+import os
+import sys
+import io
+import json
+import base64
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+INDEX_VERSION = 2
+INDEX_FILENAME = "music_index.json"
+DEFAULT_MUSIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "temp", "music_cache")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg", ".flac", ".m4a", ".aac")
+
+ANALYSIS_SAMPLE_RATE = 11025
+ENERGY_HOP_SECONDS = 0.5
+ENERGY_FLOOR_DB = -60.0
+ONSET_FFT = 1024
+ONSET_HOP = 256
+MIN_BPM, MAX_BPM = 60.0, 200.0
+
+
+def log(message):
+    print(f"[Music Index] {message}", file=sys.stderr)
+
+
+# -------------------------
+# Decode + loudness (tek ffmpeg çağrısı: loudnorm ölçümü + analiz PCM'i)
+# -------------------------
+def decode_and_measure(path):
+    """Returns: (mono float32 PCM @ ANALYSIS_SAMPLE_RATE, loudnorm ölçümleri dict)"""
+    args = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-i", path,
+        "-map", "0:a:0", "-af", "loudnorm=print_format=json", "-f", "null", "-",
+        "-map", "0:a:0", "-ac", "1", "-ar", str(ANALYSIS_SAMPLE_RATE), "-f", "f32le", "pipe:1",
+    ]
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode('utf-8', 'replace')[-300:]}")
+
+    stderr = proc.stderr.decode("utf-8", "replace")
+    json_start = stderr.rfind("{")
+    json_end = stderr.rfind("}")
+    if json_start < 0 or json_end < json_start:
+        raise RuntimeError("loudnorm measurement not found in ffmpeg output")
+    stats = json.loads(stderr[json_start:json_end + 1])
+
+    pcm = np.frombuffer(proc.stdout, dtype=np.float32)
+    return pcm, stats
+
+
+def _finite(value, fallback):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return fallback
+    return value if np.isfinite(value) else fallback
+
+
+# -------------------------
+# Enerji, onset, tempo
+# -------------------------
+def energy_curve(pcm, sample_rate=ANALYSIS_SAMPLE_RATE):
+    """0.5 sn pencerelerde RMS (dBFS) -> uint8 (0 = -60 dB, 255 = 0 dB)"""
+    hop = int(sample_rate * ENERGY_HOP_SECONDS)
+    frames = len(pcm) // hop
+    if frames == 0:
+        return np.zeros(0, dtype=np.uint8)
+    rms = np.sqrt(np.mean(pcm[:frames * hop].reshape(frames, hop) ** 2, axis=1) + 1e-12)
+    db = 20.0 * np.log10(rms)
+    return np.clip((db - ENERGY_FLOOR_DB) * 255.0 / -ENERGY_FLOOR_DB, 0, 255).astype(np.uint8)
+
+
+def onset_envelope(pcm):
+    """Log-magnitude spectral flux (pozitif farklar), hop = ONSET_HOP"""
+    if len(pcm) < ONSET_FFT:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(pcm, ONSET_FFT)[::ONSET_HOP]
+    window = np.hanning(ONSET_FFT).astype(np.float32)
+    magnitude = np.log1p(100.0 * np.abs(np.fft.rfft(frames * window, axis=1)))
+    flux = np.maximum(0.0, np.diff(magnitude, axis=0)).sum(axis=1)
+    # Yavaş değişimleri çıkar (yaklaşık 1 sn hareketli ortalama)
+    kernel = np.ones(43, dtype=np.float32) / 43.0
+    flux = flux - np.convolve(flux, kernel, mode="same")
+    flux = np.maximum(flux, 0.0)
+    peak = flux.max() if flux.size else 0.0
+    return (flux / peak).astype(np.float32) if peak > 0 else flux.astype(np.float32)
+
+
+def estimate_tempo(envelope, fps):
+    """
+    Onset otokorelasyonu + 120 BPM merkezli log-gauss ağırlık (oktav hatalarını azaltır)
+    Returns: (bpm, confidence 0-1)
+    """
+    if envelope.size < fps * 4:
+        return None, 0.0
+
+    n = 1 << int(np.ceil(np.log2(2 * envelope.size)))
+    spectrum = np.fft.rfft(envelope - envelope.mean(), n)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), n)[:envelope.size]
+    if acf[0] <= 0:
+        return None, 0.0
+    acf = acf / acf[0]
+
+    min_lag = int(np.floor(60.0 * fps / MAX_BPM))
+    max_lag = int(np.ceil(60.0 * fps / MIN_BPM))
+    lags = np.arange(max(min_lag, 1), min(max_lag, acf.size - 1) + 1)
+    if lags.size == 0:
+        return None, 0.0
+    bpms = 60.0 * fps / lags
+    weights = np.exp(-0.5 * (np.log2(bpms / 120.0) / 1.0) ** 2)
+    # Tamsayı olmayan periyotlarda tepe iki komşu lag'e bölünür - 3 lag'lik pozitif toplam kullan
+    positive = np.clip(acf, 0.0, None)
+    peaks = positive[lags - 1] + positive[lags] + positive[np.minimum(lags + 1, acf.size - 1)]
+    best = int(np.argmax(peaks * weights))
+    best += int(np.argmax(acf[lags[best] - 1:lags[best] + 2])) - 1
+    best = int(np.clip(best, 0, lags.size - 1))
+    lag = float(lags[best])
+
+    # Parabolik interpolasyon ile alt-frame çözünürlük
+    if 0 < best < lags.size - 1:
+        y0, y1, y2 = acf[lags[best] - 1], acf[lags[best]], acf[lags[best] + 1]
+        denominator = y0 - 2 * y1 + y2
+        if denominator != 0:
+            lag += 0.5 * (y0 - y2) / denominator
+
+    return 60.0 * fps / lag, float(np.clip(acf[lags[best]], 0.0, 1.0))
+
+
+def beat_grid(envelope, fps, bpm):
+    """
+    Beat grid: tempo (±2%, 0.05 BPM adım) ve faz birlikte aranır -
+    offset + k * periyot noktalarındaki onset toplamını maksimize eden (bpm, ilk vuruş sn)
+    Otokorelasyon tahminindeki küçük tempo hatası uzun parçada fazı kaydırdığı için gerekli
+    """
+    candidates = np.arange(bpm * 0.98, bpm * 1.02, 0.05)
+    best_score, best_bpm, best_offset = -1.0, bpm, 0.0
+    for candidate in candidates:
+        period = 60.0 * fps / candidate
+        phases = np.arange(0.0, period, 0.5)
+        beats = np.arange(int((envelope.size - 1) // period) + 1) * period
+        positions = np.rint(phases[:, None] + beats[None, :]).astype(np.int64)
+        scores = np.where(positions < envelope.size, envelope[np.minimum(positions, envelope.size - 1)], 0.0).sum(axis=1)
+        index = int(np.argmax(scores))
+        if scores[index] > best_score:
+            best_score, best_bpm, best_offset = scores[index], candidate, phases[index]
+
+    # Flux k. indeksi, onset'in (k + 1). pencerenin ilk çeyreğine girdiği ana denk gelir
+    latency = (ONSET_HOP + 3 * ONSET_FFT / 4) / ANALYSIS_SAMPLE_RATE
+    return float(best_bpm), float((best_offset / fps + latency) % (60.0 / best_bpm))
+
+
+def energy_score(bpm, lufs, energy):
+    """
+    0-1 enerji skoru - üç ölçümün ağırlıklı ortalaması:
+      - tempo:       70 BPM -> 0, 140 BPM -> 1
+      - loudness:    mastering seviyesi, -26 LUFS -> 0, -8 LUFS -> 1
+      - süreklilik:  enerji eğrisinin medyanı tepesine (95. persentil) ne kadar yakın
+                     (12 dB altı -> 0 = seyrek/dinamik, tepeyle aynı -> 1 = sürekli yoğun)
+    """
+    tempo = np.clip((bpm - 70.0) / 70.0, 0.0, 1.0) if bpm else 0.0
+    loudness = np.clip((lufs + 26.0) / 18.0, 0.0, 1.0)
+    sustain = 0.0
+    if energy.size:
+        db = energy.astype(np.float32) * -ENERGY_FLOOR_DB / 255.0 + ENERGY_FLOOR_DB
+        sustain = np.clip(1.0 + (np.median(db) - np.percentile(db, 95)) / 12.0, 0.0, 1.0)
+    return float(0.35 * tempo + 0.35 * loudness + 0.3 * sustain)
+
+
+def energy_level(score):
+    """intelligentMusicService 'low' / 'medium' / 'high' enerji seçimi için sınıf"""
+    if score >= 0.6:
+        return "high"
+    if score < 0.4:
+        return "low"
+    return "medium"
+
+
+def analyze_file(path):
+    pcm, stats = decode_and_measure(path)
+    duration = len(pcm) / ANALYSIS_SAMPLE_RATE
+    energy = energy_curve(pcm)
+    fps = ANALYSIS_SAMPLE_RATE / ONSET_HOP
+    envelope = onset_envelope(pcm)
+    bpm, confidence = estimate_tempo(envelope, fps)
+    offset = None
+    if bpm:
+        bpm, offset = beat_grid(envelope, fps, bpm)
+
+    lufs = _finite(stats.get("input_i"), -70.0)
+    score = energy_score(bpm, lufs, energy)
+
+    return {
+        "duration": round(duration, 3),
+        "lufs": round(lufs, 2),
+        "true_peak": round(_finite(stats.get("input_tp"), 0.0), 2),
+        "lra": round(_finite(stats.get("input_lra"), 0.0), 2),
+        "threshold": round(_finite(stats.get("input_thresh"), -70.0), 2),
+        "bpm": round(bpm, 2) if bpm else None,
+        "beat_offset": round(offset, 3) if bpm else None,
+        "beat_confidence": round(confidence, 3),
+        "energy_score": round(score, 3),
+        "energy_level": energy_level(score),
+        "energy_hop": ENERGY_HOP_SECONDS,
+        "energy": base64.b64encode(energy.tobytes()).decode("ascii"),
+    }
+
+
+def decode_energy(entry):
+    """Index girdisindeki enerji eğrisini dB dizisine çevir"""
+    raw = np.frombuffer(base64.b64decode(entry["energy"]), dtype=np.uint8)
+    return raw.astype(np.float32) * -ENERGY_FLOOR_DB / 255.0 + ENERGY_FLOOR_DB
+
+
+# -------------------------
+# Index (artımlı)
+# -------------------------
+def index_path(music_dir):
+    return os.path.join(music_dir, INDEX_FILENAME)
+
+
+def load_index(music_dir):
+    path = index_path(music_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except Exception as e:
+            log(f"WARNING: Index unreadable, rebuilding: {e}")
+    return {"version": INDEX_VERSION, "tracks": {}}
+
+
+def save_index(music_dir, index):
+    path = index_path(music_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    # mtime_ns string olarak: 19 haneli tamsayı JSON.parse'ta double'a yuvarlanır (Node karşılaştırması bozulur)
+    return {"size": stat.st_size, "mtime_ns": str(stat.st_mtime_ns)}
+
+
+def scan(music_dir, force=False, workers=None):
+    """Yeni/değişen dosyaları analiz et, silinenleri çıkar. Returns: (index, analyzed, removed)"""
+    index = load_index(music_dir)
+    tracks = index["tracks"]
+
+    present = {
+        name for name in os.listdir(music_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(os.path.join(music_dir, name))
+    }
+    removed = [name for name in tracks if name not in present]
+    for name in removed:
+        del tracks[name]
+
+    pending = []
+    for name in sorted(present):
+        signature = file_signature(os.path.join(music_dir, name))
+        entry = tracks.get(name)
+        if force or not entry or entry.get("size") != signature["size"] or entry.get("mtime_ns") != signature["mtime_ns"]:
+            pending.append((name, signature))
+
+    def work(item):
+        name, signature = item
+        try:
+            return name, {**signature, **analyze_file(os.path.join(music_dir, name))}, None
+        except Exception as e:
+            return name, None, e
+
+    analyzed = 0
+    # ffmpeg alt süreçleri I/O ağırlıklı - thread havuzu yeterli
+    with ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1)) as pool:
+        for name, entry, error in pool.map(work, pending):
+            if error is not None:
+                log(f"WARNING: {name}: {error}")
+                continue
+            tracks[name] = entry
+            analyzed += 1
+            bpm = f"{entry['bpm']:.1f} BPM" if entry["bpm"] else "no tempo"
+            log(f"{name}: {entry['duration']:.1f}s, {entry['lufs']:.1f} LUFS, {bpm}, {entry['energy_level']}")
+
+    if analyzed or removed or not os.path.exists(index_path(music_dir)):
+        save_index(music_dir, index)
+    return index, analyzed, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build/update the background music analysis index")
+    parser.add_argument("command", nargs="?", default="scan", choices=["scan", "get"])
+    parser.add_argument("file", nargs="?", help="Track file name (get)")
+    parser.add_argument("--dir", default=DEFAULT_MUSIC_DIR, help="Music cache directory")
+    parser.add_argument("--force", action="store_true", help="Re-analyze every file")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    music_dir = os.path.abspath(args.dir)
+    if not os.path.isdir(music_dir):
+        log(f"ERROR: Music directory not found: {music_dir}")
+        sys.exit(1)
+
+    if args.command == "get":
+        if not args.file:
+            parser.error("get requires a file name")
+        entry = load_index(music_dir)["tracks"].get(os.path.basename(args.file))
+        print(json.dumps(entry, indent=2) if entry else "null")
+        sys.exit(0 if entry else 1)
+
+    index, analyzed, removed = scan(music_dir, args.force, args.workers)
+    print(json.dumps({
+        "success": True,
+        "index": index_path(music_dir),
+        "tracks": len(index["tracks"]),
+        "analyzed": analyzed,
+        "removed": len(removed),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+In-Memory PCM Handoff (float32 mono + sample rate)
+Runner'lar arasında sesi WAV encode/decode etmeden paylaşır:
+  - shm:  multiprocessing.shared_memory (POSIX'te yayınlayan süreç çıktıktan sonra da yaşar)
+  - mmap: RAM disk (/dev/shm) veya temp/pcm_scratch altında memory-mapped scratch dosyası
+Tüketici (faster_whisper_transcribe.py vb.) diziye kopyasız görünüm olarak bağlanır
+Tanımlayıcı küçük bir JSON'dur (*.pcm.json): backend, isim/yol, örnek sayısı, sample rate
+Diske yalnızca nihai çıktı yazılır (export)
+
+Kullanım:
+  python pcm_handoff.py info <descriptor.pcm.json>
+  python pcm_handoff.py export <descriptor.pcm.json> <output.wav> [--sample-rate 24000] [--release]
+  python pcm_handoff.py release <descriptor.pcm.json>
+"""
+import os
+import sys
+import io
+import json
+import wave
+import uuid
+import argparse
+from math import gcd
+
+import numpy as np
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+DESCRIPTOR_VERSION = 1
+DESCRIPTOR_SUFFIX = ".pcm.json"
+BACKENDS = ("shm", "mmap")
+WHISPER_SAMPLE_RATE = 16000
+
+# Linux'ta /dev/shm RAM'dedir - scratch dosyası diske hiç inmez
+SCRATCH_DIR = "/dev/shm/youtube_shorts_pcm" if os.path.isdir("/dev/shm") else os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "temp", "pcm_scratch")
+
+
+def log(message):
+    print(f"[PCM Handoff] {message}", file=sys.stderr)
+
+
+def default_backend():
+    """
+    PCM_HANDOFF_BACKEND env veya platform varsayılanı
+    Windows'ta shared memory son handle kapanınca silinir - süreçler arası aktarımda mmap gerekir
+    """
+    backend = os.environ.get("PCM_HANDOFF_BACKEND", "").strip().lower()
+    if backend in BACKENDS:
+        return backend
+    return "mmap" if sys.platform == "win32" else "shm"
+
+
+def is_descriptor_path(path):
+    return isinstance(path, str) and path.endswith(DESCRIPTOR_SUFFIX)
+
+
+# -------------------------
+# Shared memory yardımcıları
+# -------------------------
+def _open_shared_memory(name, create=False, size=0):
+    """
+    Resource tracker'ı devre dışı bırak: aksi halde yayınlayan/bağlanan süreç çıkarken
+    segmenti siler (Python 3.13+: track=False, öncesi: unregister)
+    """
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if sys.platform != "win32":
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return shm
+
+
+def _unlink_shared_memory(shm):
+    """Python < 3.13: unlink() tracker'dan düşürmeye çalışır - önce tekrar kaydet (KeyError uyarısı olmasın)"""
+    if sys.platform != "win32" and sys.version_info < (3, 13):
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.register(shm._name, "shared_memory")
+        except Exception:
+            pass
+    shm.unlink()
+
+
+# -------------------------
+# Publish / attach / release
+# -------------------------
+def publish(audio, sample_rate, backend=None, descriptor_path=None):
+    """
+    float32 mono diziyi paylaşılan belleğe kopyala (tek kopya - sonraki tüm tüketiciler kopyasız okur)
+    Returns: descriptor dict (descriptor_path verilirse JSON olarak da yazılır)
+    """
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PCM handoff backend: {backend} (use one of {BACKENDS})")
+
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    name = f"pcm_{os.getpid()}_{uuid.uuid4().hex[:12]}"
+    descriptor = {
+        "version": DESCRIPTOR_VERSION,
+        "backend": backend,
+        "name": name,
+        "path": None,
+        "samples": int(audio.size),
+        "channels": 1,
+        "sample_rate": int(sample_rate),
+        "dtype": "float32",
+    }
+
+    # Boş segment/dosya oluşturulamaz - en az bir örneklik yer ayrılır
+    nbytes = max(audio.nbytes, 4)
+    if backend == "shm":
+        shm = _open_shared_memory(name, create=True, size=nbytes)
+        np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+        shm.close()
+    else:
+        os.makedirs(SCRATCH_DIR, exist_ok=True)
+        path = os.path.join(SCRATCH_DIR, name + ".f32")
+        target = np.memmap(path, dtype=np.float32, mode="w+", shape=(max(audio.size, 1),))
+        target[:audio.size] = audio
+        target.flush()
+        del target
+        descriptor["path"] = os.path.abspath(path)
+
+    if descriptor_path:
+        write_descriptor(descriptor, descriptor_path)
+    return descriptor
+
+
+def write_descriptor(descriptor, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(descriptor, f)
+    os.replace(tmp_path, path)
+
+
+def read_descriptor(descriptor):
+    """Descriptor dict veya *.pcm.json yolu"""
+    if isinstance(descriptor, dict):
+        return descriptor
+    with open(descriptor, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != DESCRIPTOR_VERSION or data.get("backend") not in BACKENDS:
+        raise ValueError(f"Unsupported PCM descriptor: {descriptor}")
+    return data
+
+
+def attach(descriptor):
+    """
+    Paylaşılan sese kopyasız bağlan
+    Returns: (audio float32 view, sample_rate, handle) - handle release()'e verilmeli
+    NOT: release'ten önce dizi (ve ondan türetilen view'ler) bırakılmalı
+    """
+    descriptor = read_descriptor(descriptor)
+    samples = descriptor["samples"]
+    if descriptor["backend"] == "shm":
+        shm = _open_shared_memory(descriptor["name"])
+        audio = np.ndarray((samples,), dtype=np.float32, buffer=shm.buf)
+        return audio, descriptor["sample_rate"], shm
+
+    # mode='c': copy-on-write - tüketici yerinde işlem yapabilir, kaynak değişmez
+    audio = np.memmap(descriptor["path"], dtype=np.float32, mode="c", shape=(max(samples, 1),))[:samples]
+    return audio, descriptor["sample_rate"], None
+
+
+def release(handle=None, descriptor=None, unlink=False):
+    """Bağlantıyı kapat; unlink=True ise paylaşılan belleği/scratch dosyasını da sil (sahip süreç)"""
+    if handle is not None:
+        handle.close()
+    if not unlink or descriptor is None:
+        return
+    descriptor = read_descriptor(descriptor)
+    try:
+        if descriptor["backend"] == "shm":
+            shm = handle if handle is not None else _open_shared_memory(descriptor["name"])
+            _unlink_shared_memory(shm)
+            if handle is None:
+                shm.close()
+        elif descriptor.get("path"):
+            os.remove(descriptor["path"])
+    except (FileNotFoundError, OSError) as e:
+        log(f"WARNING: Release of {descriptor['name']} incomplete: {e}")
+
+
+# -------------------------
+# Dönüşümler
+# -------------------------
+def resample(audio, source_rate, target_rate):
+    """Polyphase resample (scipy), yoksa lineer interpolasyon - aynı hızda kopyasız geri döner"""
+    if source_rate == target_rate:
+        return audio
+    try:
+        from scipy.signal import resample_poly
+        divisor = gcd(int(source_rate), int(target_rate))
+        resampled = resample_poly(audio, int(target_rate) // divisor, int(source_rate) // divisor)
+    except ImportError:
+        length = int(round(len(audio) * target_rate / source_rate))
+        positions = np.arange(length, dtype=np.float64) * (source_rate / target_rate)
+        resampled = np.interp(positions, np.arange(len(audio)), audio)
+    return np.ascontiguousarray(resampled, dtype=np.float32)
+
+
+def load_for_whisper(descriptor):
+    """
+    Descriptor'daki sesi faster-whisper girişine (16 kHz float32) çevir
+    Returns: (audio, handle) - 16 kHz kaynakta audio paylaşılan belleğe kopyasız view'dir
+    """
+    audio, sample_rate, handle = attach(descriptor)
+    return resample(audio, sample_rate, WHISPER_SAMPLE_RATE), handle
+
+
+def write_wav(path, audio, sample_rate):
+    """Nihai çıktı: 16-bit PCM mono WAV (atomik)"""
+    pcm = (np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0) * 32767.0).astype("<i2")
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.partial{ext}"
+    with wave.open(tmp_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(int(sample_rate))
+        f.writeframes(pcm.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, export or release shared PCM buffers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info")
+    info.add_argument("descriptor")
+    export = sub.add_parser("export", help="Write the final WAV artifact")
+    export.add_argument("descriptor")
+    export.add_argument("output")
+    export.add_argument("--sample-rate", type=int, default=None, help="Resample before writing")
+    export.add_argument("--release", action="store_true", help="Unlink the buffer and descriptor afterwards")
+    rel = sub.add_parser("release", help="Unlink the buffer and descriptor")
+    rel.add_argument("descriptor")
+    args = parser.parse_args()
+
+    descriptor = read_descriptor(args.descriptor)
+    if args.command == "info":
+        print(json.dumps({**descriptor, "duration": round(descriptor["samples"] / descriptor["sample_rate"], 3)}))
+        return
+
+    if args.command == "export":
+        audio, sample_rate, handle = attach(descriptor)
+        target_rate = args.sample_rate or sample_rate
+        write_wav(args.output, resample(audio, sample_rate, target_rate), target_rate)
+        del audio
+        release(handle)
+        print(json.dumps({"success": True, "output": args.output, "sample_rate": target_rate}))
+        if not args.release:
+            return
+
+    release(descriptor=descriptor, unlink=True)
+    try:
+        os.remove(args.descriptor)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Script <-> ASR Word Reconciliation
+Faster-Whisper kelimelerini bilinen script ile hizalar:
+  - Banded edit-distance DP (satır başına NumPy vektörleri, O(n * band) - uzun scriptlerde lineer)
+  - Kaçırılan / birleşen kelimeler için zamanlama interpolasyonu (karakter uzunluğuna orantılı)
+  - NumPy ile vektörize boşluk / çakışma düzeltme
+Çıktı: Script kelimeleriyle BİREBİR (scriptText.split(/\\s+/)), monoton kelime zamanlamaları
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+DELETE_COST = 1.0       # Script kelimesi ASR'de yok (kaçırılmış)
+INSERT_COST = 1.0       # ASR'de fazladan kelime
+PARTIAL_COST = 0.5      # Aynı kök (ilk 3 harf) veya önek - yanlış duyulmuş ek/son
+MISMATCH_COST = 1.0     # Tamamen farklı kelime (yine de aynı zaman diliminde)
+
+MIN_BAND = 64           # DP bandının yarı genişliği (kelime)
+MAX_BAND = 256          # Üst sınır - maliyet O(n * MAX_BAND) ile lineer kalır
+MIN_WORD_DURATION = 0.04
+GAP_CLOSE_SECONDS = 0.08
+DEFAULT_WORD_DURATION = 0.3
+
+DIAG, UP, LEFT = 0, 1, 2
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_token(token):
+    """Karşılaştırma anahtarı: küçük harf, aksan/noktalama yok (ş->s, İ->i, "10."->"10")"""
+    decomposed = unicodedata.normalize("NFKD", token.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub("", stripped.replace("ı", "i"))
+
+
+def _encode(script_keys, asr_keys):
+    """Token'ları tamsayı ID'lere çevir (tam eşleşme ve 3 harflik kök için) - DP'de vektörize karşılaştırma"""
+    vocab = {}
+    stem_vocab = {}
+
+    def ids(keys, table, transform):
+        return np.array([table.setdefault(transform(k), len(table)) for k in keys], dtype=np.int64)
+
+    script_ids = ids(script_keys, vocab, lambda k: k)
+    asr_ids = ids(asr_keys, vocab, lambda k: k)
+    script_stems = ids(script_keys, stem_vocab, lambda k: k[:3])
+    asr_stems = ids(asr_keys, stem_vocab, lambda k: k[:3])
+
+    # Boş anahtarlar (sadece noktalama) hiçbir şeyle eşleşmesin
+    script_ids[[not k for k in script_keys]] = -1
+    script_stems[[not k for k in script_keys]] = -1
+    asr_ids[[not k for k in asr_keys]] = -2
+    asr_stems[[not k for k in asr_keys]] = -2
+    return script_ids, asr_ids, script_stems, asr_stems
+
+
+def _shifted(row, offset, fill=np.inf):
+    """out[k] = row[k + offset] (aralık dışı -> fill)"""
+    out = np.full_like(row, fill)
+    size = len(row)
+    if offset >= 0:
+        if offset < size:
+            out[:size - offset] = row[offset:]
+    elif -offset < size:
+        out[-offset:] = row[:size + offset]
+    return out
+
+
+def banded_alignment(script_keys, asr_keys, band=None):
+    """
+    Banded edit-distance DP - bant, orantılı köşegen (j ~ i * m / n) etrafında
+    Satır içi LEFT (ekleme) bağımlılığı kümülatif minimum ile vektörize edilir:
+        cost[k] = min_{k' <= k} base[k'] + (k - k') * INSERT_COST
+    Returns: [(op, script_index, asr_index, sub_cost), ...] soldan sağa
+    """
+    n, m = len(script_keys), len(asr_keys)
+    if band is None:
+        band = min(MAX_BAND, max(MIN_BAND, abs(n - m) // 2 + 16))
+    width = 2 * band + 1
+    offsets = np.arange(width)
+
+    script_ids, asr_ids, script_stems, asr_stems = _encode(script_keys, asr_keys)
+    asr_ids_pad = np.concatenate([asr_ids, [-3]])
+    asr_stems_pad = np.concatenate([asr_stems, [-3]])
+
+    lows = np.rint(np.arange(n + 1) * (m / max(n, 1))).astype(np.int64) - band
+    back = np.zeros((n + 1, width), dtype=np.int8)
+    sub_costs = np.zeros((n + 1, width), dtype=np.float32)
+
+    js = lows[0] + offsets
+    cost = np.where((js >= 0) & (js <= m), js * INSERT_COST, np.inf)
+    back[0] = LEFT
+
+    for i in range(1, n + 1):
+        js = lows[i] + offsets
+        valid = (js >= 0) & (js <= m)
+        shift = lows[i] - lows[i - 1]
+
+        # Substitution maliyeti: script[i-1] vs asr[j-1]
+        asr_index = np.clip(js - 1, 0, m)
+        sub = np.where(asr_ids_pad[asr_index] == script_ids[i - 1], 0.0,
+                       np.where(asr_stems_pad[asr_index] == script_stems[i - 1], PARTIAL_COST, MISMATCH_COST))
+        diag = np.where(js >= 1, _shifted(cost, shift - 1) + sub, np.inf)
+        up = _shifted(cost, shift) + DELETE_COST
+
+        base = np.minimum(diag, up)
+        base[~valid] = np.inf
+        row = offsets * INSERT_COST + np.minimum.accumulate(base - offsets * INSERT_COST)
+        row[~valid] = np.inf
+
+        back[i] = np.where(row < base - 1e-9, LEFT, np.where(diag <= up, DIAG, UP))
+        sub_costs[i] = sub
+        cost = row
+
+    # Traceback (n, m) -> (0, 0)
+    path = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        k = j - lows[i]
+        op = back[i, k] if i > 0 else LEFT
+        if op == DIAG:
+            path.append((DIAG, i - 1, j - 1, float(sub_costs[i, k])))
+            i, j = i - 1, j - 1
+        elif op == UP:
+            path.append((UP, i - 1, None, DELETE_COST))
+            i -= 1
+        else:
+            path.append((LEFT, None, j - 1, INSERT_COST))
+            j -= 1
+    path.reverse()
+    return path
+
+
+def _distribute(start, end, weights):
+    """[start, end] aralığını ağırlıklara (karakter uzunlukları) göre böl"""
+    weights = np.maximum(np.asarray(weights, dtype=np.float64), 1.0)
+    edges = start + (end - start) * np.concatenate([[0.0], np.cumsum(weights) / weights.sum()])
+    return edges[:-1], edges[1:]
+
+
+def smooth_timings(starts, ends, audio_end=None):
+    """
+    Vektörize düzeltme:
+      1. Başlangıçlar monoton ve en az MIN_WORD_DURATION aralıklı
+      2. Çakışmalar kırpılır (end <= sonraki start)
+      3. Küçük boşluklar (< GAP_CLOSE_SECONDS) kapatılır
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    if len(starts) == 0:
+        return starts, ends
+
+    steps = np.arange(len(starts)) * MIN_WORD_DURATION
+    starts = np.maximum.accumulate(np.maximum(starts, 0.0) - steps) + steps
+    ends = np.maximum(ends, starts + MIN_WORD_DURATION)
+
+    next_starts = starts[1:]
+    ends[:-1] = np.minimum(ends[:-1], next_starts)
+    gaps = next_starts - ends[:-1]
+    ends[:-1] = np.where(gaps < GAP_CLOSE_SECONDS, next_starts, ends[:-1])
+
+    if audio_end is not None and audio_end > 0:
+        ends[-1] = min(ends[-1], max(audio_end, starts[-1] + MIN_WORD_DURATION))
+    return starts, ends
+
+
+def reconcile(script_text, asr_words, audio_duration=None, band=None):
+    """
+    Script kelimelerine ASR zamanlamalarını ata
+
+    Args:
+        script_text: Bilinen script (whitespace ile bölünür - whisperService.js ile aynı)
+        asr_words: Faster-Whisper kelimeleri [{word, start, end, probability}]
+        audio_duration: Ses süresi (saniye) - bilinmiyorsa son ASR kelimesinin sonu
+        band: DP bandı (None = otomatik)
+
+    Returns:
+        (aligned_words, stats) - aligned_words her script kelimesi için
+        {word, start, end, probability, source: exact|partial|substituted|interpolated}
+    """
+    script_tokens = script_text.split()
+    n = len(script_tokens)
+    if n == 0:
+        return [], {"script_words": 0, "asr_words": len(asr_words)}
+
+    asr_starts = np.array([float(w["start"]) for w in asr_words], dtype=np.float64)
+    asr_ends = np.array([float(w["end"]) for w in asr_words], dtype=np.float64)
+    audio_end = audio_duration or (float(asr_ends.max()) if len(asr_ends) else None)
+
+    starts = np.full(n, np.nan)
+    ends = np.full(n, np.nan)
+    probabilities = np.zeros(n)
+    sources = ["interpolated"] * n
+
+    path = banded_alignment([normalize_token(t) for t in script_tokens],
+                            [normalize_token(w["word"]) for w in asr_words], band) if len(asr_words) else []
+
+    extend = None
+    for op, si, ai, sub_cost in path:
+        if op == DIAG:
+            starts[si], ends[si] = asr_starts[ai], asr_ends[ai]
+            probabilities[si] = asr_words[ai].get("probability", 0.0) or 0.0
+            sources[si] = "exact" if sub_cost == 0 else "partial" if sub_cost < MISMATCH_COST else "substituted"
+            extend = si if sub_cost > 0 else None
+        elif op == LEFT:
+            if extend is not None:
+                # ASR bir script kelimesini bölmüş ("can" + "not" = "cannot") - süreyi uzat
+                ends[extend] = asr_ends[ai]
+        else:
+            extend = None
+
+    anchored = ~np.isnan(starts)
+    matched_durations = (ends - starts)[anchored]
+    typical = float(np.median(matched_durations)) if matched_durations.size else DEFAULT_WORD_DURATION
+    typical = max(typical, MIN_WORD_DURATION)
+    weights = np.array([max(len(t), 1) for t in script_tokens], dtype=np.float64)
+
+    if not anchored.any():
+        # Hiç eşleşme yok - ASR aralığına (yoksa tüm süreye) orantılı dağıt
+        span_start = float(asr_starts.min()) if len(asr_starts) else 0.0
+        span_end = audio_end or n * typical
+        starts, ends = _distribute(span_start, span_end, weights)
+    else:
+        # Eşleşmemiş script kelimesi dizilerini (run) komşu anchor'lar arasına yerleştir
+        anchor_idx = np.flatnonzero(anchored)
+        missing = np.flatnonzero(~anchored)
+        run_breaks = np.flatnonzero(np.diff(missing) > 1) + 1
+        for run in np.split(missing, run_breaks) if missing.size else []:
+            first, last = run[0], run[-1]
+            prev_pos = np.searchsorted(anchor_idx, first) - 1
+            prev = anchor_idx[prev_pos] if prev_pos >= 0 else None
+            nxt = anchor_idx[prev_pos + 1] if prev_pos + 1 < len(anchor_idx) else None
+            needed = typical * len(run)
+
+            if prev is None:
+                window_end = starts[nxt]
+                window_start = max(0.0, window_end - needed)
+                s, e = _distribute(window_start, window_end, weights[run])
+                starts[run], ends[run] = s, e
+                continue
+
+            window_start = ends[prev]
+            window_end = starts[nxt] if nxt is not None else min(window_start + needed, audio_end or window_start + needed)
+            if window_end - window_start >= MIN_WORD_DURATION * len(run):
+                s, e = _distribute(window_start, window_end, weights[run])
+                starts[run], ends[run] = s, e
+            else:
+                # Boşluk yok - ASR kelimeleri birleştirmiş: önceki anchor'ın süresini paylaştır
+                group = np.concatenate([[prev], run])
+                s, e = _distribute(starts[prev], max(window_end, starts[prev] + MIN_WORD_DURATION * len(group)),
+                                   weights[group])
+                starts[group], ends[group] = s, e
+
+    starts, ends = smooth_timings(starts, ends, audio_end)
+
+    aligned = [
+        {
+            "word": token,
+            "start": round(float(starts[i]), 3),
+            "end": round(float(ends[i]), 3),
+            "probability": round(float(probabilities[i]), 4),
+            "source": sources[i],
+        }
+        for i, token in enumerate(script_tokens)
+    ]
+    stats = {"script_words": n, "asr_words": len(asr_words)}
+    for source in ("exact", "partial", "substituted", "interpolated"):
+        stats[source] = sources.count(source)
+    stats["asr_extra"] = sum(1 for op, *_ in path if op == LEFT)
+    return aligned, stats
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+CPU Inference Benchmark - float32 vs int8 vs onnx
+Her ses için hız (RTF) ve kalite (float32'ye göre spektral sapma, float32'nin seed'ler arası noise floor'una göre) karşılaştırması yapar
+Sonuçları comparison_report.json'a, ses başına önerilen modu voice_modes.json'a yazar
+Runner'lar (TTS_CPU_INFERENCE=auto veya boş iken) bu öneriyi otomatik kullanır
+
+Kullanım:
+  python tts_cpu_benchmark.py xtts voice_samples/narrator_sample_2.wav voice_samples/audio.wav --language en
+  python tts_cpu_benchmark.py vits p230 p317
+"""
+import os
+import sys
+import io
+import gc
+import json
+import time
+import wave
+import argparse
+
+import numpy as np
+
+from tts_cpu_inference import (
+    CPU_INFERENCE_MODES,
+    apply_cpu_mode,
+    get_cache_dir,
+    load_voice_modes,
+    save_voice_modes,
+    voice_key,
+)
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+MODELS = {
+    "xtts": "tts_models/multilingual/multi-dataset/xtts_v2",
+    "vits": "tts_models/en/vctk/vits",
+}
+
+# Belgesel tarzı test cümleleri (kısa + orta + uzun)
+SAMPLE_TEXTS = [
+    "Subscribe now, and do not miss out.",
+    "These armies weren't just massive, they were unstoppable forces that reshaped the world.",
+    "The Roman Imperial Legions were iron formations that carved their power into the map of the ancient world, "
+    "marching for centuries across three continents.",
+]
+
+# Öneri eşikleri: XTTS/VITS örnekleme yapar (temperature / noise_scale) - aynı seed'de bile int8 logit'leri
+# farklı token dizisi üretir. Bu yüzden modlar float32'nin kendi seed'ler arası farkına (noise floor) göre
+# değerlendirilir: spektral fark <= floor * NOISE_TOLERANCE + NOISE_MARGIN_DB olmalı
+NOISE_TOLERANCE = 1.25
+NOISE_MARGIN_DB = 0.5
+# Run ortalamalı süre oranı için mutlak sınır (noise floor'dan büyükse o kullanılır)
+MAX_DURATION_DEVIATION = 0.10
+# Noise floor için en az iki farklı seed'li float32 run'ı gerekir
+MIN_RUNS = 2
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=80):
+    """Slaney tarzı üçgen mel filtreleri [n_mels, n_fft // 2 + 1]"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    fft_freqs = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    mel_points = mel_to_hz(np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2))
+    lower, center, upper = mel_points[:-2, None], mel_points[1:-1, None], mel_points[2:, None]
+    up = (fft_freqs[None, :] - lower) / (center - lower)
+    down = (upper - fft_freqs[None, :]) / (upper - center)
+    return np.maximum(0.0, np.minimum(up, down))
+
+
+def long_term_mel_spectrum(wav, sample_rate, n_fft=1024, hop=256):
+    """Zaman ortalamalı log-mel spektrumu (dB) - hizalama gerektirmez"""
+    wav = np.asarray(wav, dtype=np.float32)
+    if len(wav) < n_fft:
+        wav = np.pad(wav, (0, n_fft - len(wav)))
+    frames = np.lib.stride_tricks.sliding_window_view(wav, n_fft)[::hop]
+    power = np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1)) ** 2
+    mel = power @ mel_filterbank(sample_rate, n_fft).T
+    return 10.0 * np.log10(mel.mean(axis=0) + 1e-10)
+
+
+def spectral_distance_db(reference, candidate, sample_rate):
+    """İki sesin uzun dönem mel spektrumları arasındaki RMS fark (dB)"""
+    ref = long_term_mel_spectrum(reference, sample_rate)
+    cand = long_term_mel_spectrum(candidate, sample_rate)
+    return float(np.sqrt(np.mean((ref - cand) ** 2)))
+
+
+def write_wav(path, wav, sample_rate):
+    pcm = (np.clip(np.asarray(wav, dtype=np.float32), -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def synthesize(tts, kind, voice, text, language):
+    if kind == "xtts":
+        return tts.tts(text=text, speaker_wav=voice, language=language, split_sentences=False)
+    return tts.tts(text=text, speaker=voice)
+
+
+def run_seed(run, text_index):
+    """Run başına farklı seed - modlar arasında aynı (run, metin) çifti aynı seed'i kullanır"""
+    return 1234 + 1000 * run + text_index
+
+
+def run_mode(kind, mode, voices, language, runs, output_dir):
+    """
+    Bir mod için modeli yükle, her sesi sentezle
+    Returns: ({voice: {wavs[run][text], synthesis_seconds, audio_seconds, rtf}}, sample_rate)
+    """
+    import torch
+    from TTS.api import TTS
+
+    model_name = MODELS[kind]
+    print(f"\n[CPU Benchmark] Loading {kind} model for mode={mode}...")
+    tts = TTS(model_name=model_name, gpu=False)
+    applied = apply_cpu_mode(tts, model_name, mode)
+    if applied != mode:
+        print(f"[CPU Benchmark] WARNING: {mode} unavailable (got {applied}), skipping")
+        del tts
+        gc.collect()
+        return None
+
+    sample_rate = tts.synthesizer.output_sample_rate
+    results = {}
+
+    # Warm-up: ilk çağrı (lazy init, ORT session) ölçüme dahil edilmez
+    synthesize(tts, kind, voices[0], SAMPLE_TEXTS[0], language)
+
+    for voice in voices:
+        key = voice_key(speaker_wav=voice) if kind == "xtts" else voice_key(speaker=voice)
+        wavs = []
+        elapsed = 0.0
+        audio_seconds = 0.0
+        for run in range(runs):
+            run_wavs = []
+            for i, text in enumerate(SAMPLE_TEXTS):
+                torch.manual_seed(run_seed(run, i))
+                start = time.perf_counter()
+                wav = synthesize(tts, kind, voice, text, language)
+                elapsed += time.perf_counter() - start
+                audio_seconds += len(wav) / sample_rate
+                run_wavs.append(np.asarray(wav, dtype=np.float32))
+                if run == 0:
+                    sample_name = f"{os.path.splitext(key)[0]}_{i}_{mode}.wav"
+                    write_wav(os.path.join(output_dir, sample_name), wav, sample_rate)
+            wavs.append(run_wavs)
+
+        results[key] = {
+            "wavs": wavs,
+            "synthesis_seconds": elapsed,
+            "audio_seconds": audio_seconds,
+            "rtf": elapsed / max(audio_seconds, 1e-6),
+        }
+        print(f"   {key}: RTF={results[key]['rtf']:.3f} ({elapsed:.1f}s for {audio_seconds:.1f}s audio)")
+
+    del tts
+    gc.collect()
+    return results, sample_rate
+
+
+def mean_duration_ratios(reference_wavs, candidate_wavs):
+    """Metin başına run-ortalamalı süre oranı (örnekleme gürültüsü ortalamayla azalır)"""
+    ratios = []
+    for i in range(len(SAMPLE_TEXTS)):
+        ref_len = np.mean([len(run[i]) for run in reference_wavs])
+        cand_len = np.mean([len(run[i]) for run in candidate_wavs])
+        ratios.append(cand_len / max(ref_len, 1.0))
+    return float(np.mean(ratios))
+
+
+def noise_floor(reference_wavs, sample_rate):
+    """
+    float32'nin kendi kendine farkı: farklı seed'li run çiftleri arasında spektral mesafe ve süre sapması
+    Bir modun float32'den farkı bu seviyedeyse fark örneklemeden gelir, quantization'dan değil
+    """
+    distances = []
+    deviations = []
+    for a in range(len(reference_wavs)):
+        for b in range(a + 1, len(reference_wavs)):
+            for wav_a, wav_b in zip(reference_wavs[a], reference_wavs[b]):
+                distances.append(spectral_distance_db(wav_a, wav_b, sample_rate))
+                deviations.append(abs(len(wav_b) / max(len(wav_a), 1) - 1.0))
+    return float(np.mean(distances)), float(np.mean(deviations))
+
+
+def compare(per_mode, sample_rate):
+    """float32 referansına ve float32'nin seed'ler arası noise floor'una göre hız/kalite raporu + öneri"""
+    reference = per_mode["float32"]
+    report = {}
+    for key, ref in reference.items():
+        floor_distance, floor_deviation = noise_floor(ref["wavs"], sample_rate)
+        max_distance = floor_distance * NOISE_TOLERANCE + NOISE_MARGIN_DB
+        max_deviation = max(MAX_DURATION_DEVIATION, floor_deviation * NOISE_TOLERANCE)
+
+        voice_report = {}
+        for mode, results in per_mode.items():
+            res = results[key]
+            # Aynı seed'li (run, metin) çiftleri karşılaştırılır; float32 kendisiyle 0'dır
+            distances = [
+                spectral_distance_db(r, c, sample_rate)
+                for ref_run, cand_run in zip(ref["wavs"], res["wavs"])
+                for r, c in zip(ref_run, cand_run)
+            ]
+            voice_report[mode] = {
+                "rtf": round(res["rtf"], 4),
+                "speedup": round(ref["rtf"] / max(res["rtf"], 1e-9), 3),
+                "spectral_distance_db": round(float(np.mean(distances)), 3),
+                "duration_ratio": round(mean_duration_ratios(ref["wavs"], res["wavs"]), 3),
+            }
+
+        # Kalite eşiklerini (noise floor'a göre) geçen en hızlı mod
+        acceptable = [
+            mode for mode, metrics in voice_report.items()
+            if metrics["spectral_distance_db"] <= max_distance
+            and abs(metrics["duration_ratio"] - 1.0) <= max_deviation
+        ]
+        recommended = min(acceptable or ["float32"], key=lambda m: voice_report[m]["rtf"])
+        report[key] = {
+            "modes": voice_report,
+            "noise_floor": {
+                "spectral_distance_db": round(floor_distance, 3),
+                "duration_deviation": round(floor_deviation, 3),
+            },
+            "thresholds": {
+                "spectral_distance_db": round(max_distance, 3),
+                "duration_deviation": round(max_deviation, 3),
+            },
+            "recommended": recommended,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare float32 / int8 / onnx CPU inference per voice")
+    parser.add_argument("kind", choices=sorted(MODELS.keys()))
+    parser.add_argument("voices", nargs="+", help="XTTS: speaker WAV paths, VITS: speaker IDs (p230, ...)")
+    parser.add_argument("--language", default="en", help="XTTS language code")
+    parser.add_argument("--modes", nargs="+", default=list(CPU_INFERENCE_MODES), choices=CPU_INFERENCE_MODES)
+    parser.add_argument("--runs", type=int, default=3,
+                        help=f"Repetitions per text, each with a different seed (min {MIN_RUNS}: float32 noise floor)")
+    parser.add_argument("--no-write-profile", action="store_true", help="Do not update voice_modes.json")
+    args = parser.parse_args()
+
+    if args.kind == "xtts":
+        missing = [v for v in args.voices if not os.path.exists(v)]
+        if missing:
+            print(f"[CPU Benchmark] ERROR: Speaker WAV not found: {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+
+    modes = ["float32"] + [m for m in args.modes if m != "float32"]
+    model_name = MODELS[args.kind]
+    cache_dir = get_cache_dir(model_name)
+    output_dir = os.path.join(cache_dir, "comparison")
+    os.makedirs(output_dir, exist_ok=True)
+
+    per_mode = {}
+    sample_rate = None
+    for mode in modes:
+        outcome = run_mode(args.kind, mode, args.voices, args.language, max(MIN_RUNS, args.runs), output_dir)
+        if outcome is not None:
+            per_mode[mode], sample_rate = outcome
+
+    report = compare(per_mode, sample_rate)
+
+    report_path = os.path.join(cache_dir, "comparison_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "language": args.language,
+            "texts": SAMPLE_TEXTS,
+            "runs": max(MIN_RUNS, args.runs),
+            "thresholds": {
+                "noise_tolerance": NOISE_TOLERANCE,
+                "noise_margin_db": NOISE_MARGIN_DB,
+                "min_duration_deviation": MAX_DURATION_DEVIATION,
+            },
+            "voices": report,
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'='*70}")
+    print(f"{'Voice':<28}{'Mode':<10}{'RTF':>8}{'Speedup':>10}{'SpecDist':>10}{'DurRatio':>10}")
+    print(f"{'-'*70}")
+    for key, voice_report in report.items():
+        floor = voice_report["noise_floor"]
+        print(f"{key[:27]:<28}{'(noise)':<10}{'':>18}{floor['spectral_distance_db']:>9.2f}dB"
+              f"{1.0 + floor['duration_deviation']:>10.3f}")
+        for mode, m in voice_report["modes"].items():
+            marker = " *" if mode == voice_report["recommended"] else ""
+            print(f"{key[:27]:<28}{mode:<10}{m['rtf']:>8.3f}{m['speedup']:>9.2f}x"
+                  f"{m['spectral_distance_db']:>9.2f}dB{m['duration_ratio']:>10.3f}{marker}")
+    print(f"{'='*70}")
+    print(f"* = recommended | Report: {report_path}")
+    print(f"Listening samples: {output_dir}")
+
+    if not args.no_write_profile:
+        voice_modes = load_voice_modes(model_name)
+        for key, voice_report in report.items():
+            recommended = voice_report["recommended"]
+            voice_modes[key] = {"mode": recommended, **voice_report["modes"][recommended]}
+        print(f"Per-voice modes saved: {save_voice_modes(model_name, voice_modes)}")
+
+
+if __name__ == "__main__":
+    main()
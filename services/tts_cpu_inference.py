@@ -0,0 +1,333 @@
+"""
+CPU Inference Optimizer for Coqui TTS (XTTS-v2 + VITS)
+GPU olmayan render node'ları için CPU'ya özel çıkarım modları:
+  - float32: Mevcut davranış (dokunulmaz)
+  - int8:    Linear katmanlara dinamik int8 quantization (GPT2 Conv1D dahil)
+  - onnx:    int8 + HiFi-GAN vocoder ONNX Runtime grafiği ile çalışır
+Dönüştürülen ONNX artifact'leri model klasörünün yanında cache'lenir
+"""
+import os
+import sys
+import json
+import hashlib
+
+CPU_INFERENCE_MODES = ("float32", "int8", "onnx")
+ONNX_OPSET = 17
+
+PROJECT_MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+
+
+def log(message):
+    print(f"[CPU Inference] {message}")
+
+
+def model_slug(model_name):
+    """tts_models/multilingual/multi-dataset/xtts_v2 -> tts_models--multilingual--multi-dataset--xtts_v2"""
+    return model_name.replace("/", "--")
+
+
+def get_cache_dir(model_name):
+    """
+    Artifact cache klasörü - Coqui'nin model klasörünün yanında
+    Model klasörü bulunamazsa proje models/ klasörüne düşer
+    """
+    try:
+        from TTS.utils.generic_utils import get_user_data_dir
+        model_dir = os.path.join(str(get_user_data_dir("tts")), model_slug(model_name))
+        if os.path.isdir(model_dir):
+            cache_dir = os.path.join(model_dir, "cpu_inference")
+            os.makedirs(cache_dir, exist_ok=True)
+            return cache_dir
+    except Exception:
+        pass
+
+    cache_dir = os.path.join(PROJECT_MODELS_DIR, "cpu_inference", model_slug(model_name))
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def voice_key(speaker_wav=None, speaker=None):
+    """Ses profili anahtarı: klon sesler için dosya adı, VCTK için speaker ID"""
+    if speaker_wav:
+        return os.path.basename(speaker_wav)
+    return speaker or "default"
+
+
+def load_voice_modes(model_name):
+    """tts_cpu_benchmark.py tarafından yazılan ses başına önerilen modlar"""
+    path = os.path.join(get_cache_dir(model_name), "voice_modes.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        log(f"WARNING: voice_modes.json okunamadı: {e}")
+        return {}
+
+
+def save_voice_modes(model_name, modes):
+    path = os.path.join(get_cache_dir(model_name), "voice_modes.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(modes, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def resolve_cpu_mode(model_name, key):
+    """
+    Mod seçimi önceliği:
+      1. TTS_CPU_INFERENCE env (float32 | int8 | onnx)
+      2. TTS_CPU_INFERENCE=auto veya boş -> benchmark'ın ses başına önerisi
+      3. float32 (varsayılan, eski davranış)
+    """
+    env_mode = os.environ.get("TTS_CPU_INFERENCE", "").strip().lower()
+    if env_mode in CPU_INFERENCE_MODES:
+        return env_mode
+    if env_mode and env_mode != "auto":
+        log(f"WARNING: Unknown TTS_CPU_INFERENCE={env_mode}, using auto")
+
+    recommended = load_voice_modes(model_name).get(key, {}).get("mode")
+    if recommended in CPU_INFERENCE_MODES:
+        return recommended
+    return "float32"
+
+
+def _conv1d_to_linear(module):
+    """
+    transformers GPT2 Conv1D katmanlarını nn.Linear'a çevir
+    XTTS'in GPT'si Conv1D kullanıyor - quantize_dynamic bunları tanımıyor
+    Conv1D: y = x @ W + b (W: [in, out])  ->  Linear: y = x @ W.T + b
+    """
+    import torch
+
+    try:
+        from transformers.pytorch_utils import Conv1D
+    except ImportError:
+        return 0
+
+    converted = 0
+    for name, child in list(module.named_children()):
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features, bias=child.bias is not None)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                if child.bias is not None:
+                    linear.bias.copy_(child.bias)
+            setattr(module, name, linear)
+            converted += 1
+        else:
+            converted += _conv1d_to_linear(child)
+    return converted
+
+
+def quantize_linear_layers(model):
+    """Linear katmanlara dinamik int8 quantization (ağırlıklar int8, aktivasyonlar runtime'da)"""
+    import torch
+
+    converted = _conv1d_to_linear(model)
+    if converted:
+        log(f"Converted {converted} GPT2 Conv1D layers to Linear")
+
+    torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    quantized = sum(1 for m in model.modules() if type(m).__module__.startswith("torch.ao.nn.quantized"))
+    log(f"Dynamic int8 quantization applied ({quantized} layers)")
+    return model
+
+
+def _find_waveform_decoder(tts_model):
+    """
+    (parent, attr_name, module) döner
+    XTTS: tts_model.hifigan_decoder.waveform_decoder
+    VITS: tts_model.waveform_decoder
+    """
+    hifigan_decoder = getattr(tts_model, "hifigan_decoder", None)
+    if hifigan_decoder is not None and hasattr(hifigan_decoder, "waveform_decoder"):
+        return hifigan_decoder, "waveform_decoder", hifigan_decoder.waveform_decoder
+    if hasattr(tts_model, "waveform_decoder"):
+        return tts_model, "waveform_decoder", tts_model.waveform_decoder
+    return None, None, None
+
+
+def _module_fingerprint(module):
+    """Ağırlık parmak izi - model güncellenirse ONNX cache'i geçersiz olur"""
+    digest = hashlib.sha1()
+    for name, tensor in module.state_dict().items():
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _build_onnx_decoder_class():
+    """torch import'u geciktirmek için sınıf fonksiyon içinde tanımlanır"""
+    import torch
+
+    class _OnnxWaveformDecoder(torch.nn.Module):
+        """
+        HiFi-GAN generator yerine geçen ONNX Runtime shim'i
+        Aynı forward(x, g=None) imzası; ORT hata verirse orijinal torch modülüne düşer
+        """
+
+        def __init__(self, session, has_cond, torch_module):
+            super().__init__()
+            self.session = session
+            self.has_cond = has_cond
+            self.torch_module = torch_module
+            self.onnx_failed = False
+
+        def forward(self, x, g=None):
+            if self.onnx_failed:
+                return self.torch_module(x, g=g)
+            feeds = {"x": x.detach().cpu().float().numpy()}
+            if self.has_cond:
+                feeds["g"] = g.detach().cpu().float().numpy()
+            try:
+                wav = self.session.run(["wav"], feeds)[0]
+            except Exception as e:
+                log(f"WARNING: ONNX vocoder failed, falling back to torch: {e}")
+                self.onnx_failed = True
+                return self.torch_module(x, g=g)
+            return torch.from_numpy(wav).to(x.device)
+
+    return _OnnxWaveformDecoder
+
+
+def export_vocoder_onnx(decoder, cache_dir):
+    """
+    HiFi-GAN vocoder'ı ONNX'e export et (cache'te güncel sürüm varsa atla)
+    Returns: (onnx_path, has_cond)
+    """
+    import copy
+    import torch
+
+    onnx_path = os.path.join(cache_dir, "vocoder.onnx")
+    meta_path = os.path.join(cache_dir, "vocoder.json")
+
+    in_channels = decoder.conv_pre.in_channels
+    cond_layer = getattr(decoder, "cond_layer", None)
+    has_cond = cond_layer is not None
+    fingerprint = _module_fingerprint(decoder)
+
+    if os.path.exists(onnx_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint and meta.get("torch") == torch.__version__:
+                log(f"Using cached ONNX vocoder: {onnx_path}")
+                return onnx_path, has_cond
+        except Exception:
+            pass
+
+    log("Exporting vocoder to ONNX (one-time)...")
+    export_module = copy.deepcopy(decoder).eval()
+    try:
+        export_module.remove_weight_norm()
+    except Exception:
+        pass  # Zaten kaldırılmış olabilir
+
+    x = torch.randn(1, in_channels, 64)
+    inputs = (x,)
+    input_names = ["x"]
+    dynamic_axes = {"x": {2: "frames"}, "wav": {2: "samples"}}
+    if has_cond:
+        inputs = (x, torch.randn(1, cond_layer.in_channels, 1))
+        input_names.append("g")
+
+    tmp_path = onnx_path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            export_module,
+            inputs,
+            tmp_path,
+            input_names=input_names,
+            output_names=["wav"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    os.replace(tmp_path, onnx_path)
+
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "fingerprint": fingerprint,
+            "torch": torch.__version__,
+            "in_channels": in_channels,
+            "has_cond": has_cond,
+            "opset": ONNX_OPSET,
+        }, f, indent=2)
+
+    log(f"ONNX vocoder cached: {onnx_path}")
+    return onnx_path, has_cond
+
+
+def attach_onnx_vocoder(tts_model, cache_dir):
+    """Vocoder'ı ONNX Runtime session'ı ile değiştir - başarılıysa True"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        log("WARNING: onnxruntime not installed (pip install onnxruntime), vocoder stays on torch")
+        return False
+
+    import torch
+
+    parent, attr_name, decoder = _find_waveform_decoder(tts_model)
+    if decoder is None or not hasattr(decoder, "conv_pre"):
+        log("WARNING: No HiFi-GAN vocoder found on this model, skipping ONNX")
+        return False
+
+    try:
+        onnx_path, has_cond = export_vocoder_onnx(decoder, cache_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+    except Exception as e:
+        log(f"WARNING: ONNX vocoder setup failed, vocoder stays on torch: {e}")
+        return False
+
+    decoder_class = _build_onnx_decoder_class()
+    setattr(parent, attr_name, decoder_class(session, has_cond, decoder))
+    log("Vocoder running on ONNX Runtime")
+    return True
+
+
+def apply_cpu_mode(tts, model_name, mode):
+    """
+    Yüklenmiş TTS objesine CPU modunu uygula (yalnızca GPU kullanılmıyorsa çağrılmalı)
+    Returns: Gerçekte uygulanan mod
+    """
+    if mode not in CPU_INFERENCE_MODES or mode == "float32":
+        return "float32"
+
+    tts_model = tts.synthesizer.tts_model
+    tts_model.eval()
+
+    try:
+        # ONNX export int8'den ÖNCE - vocoder conv'ları quantize edilmiyor ama
+        # export'un float ağırlıklarla yapılması gerekiyor
+        onnx_attached = False
+        if mode == "onnx":
+            onnx_attached = attach_onnx_vocoder(tts_model, get_cache_dir(model_name))
+        quantize_linear_layers(tts_model)
+    except Exception as e:
+        log(f"WARNING: CPU optimization failed ({e}), continuing with float32")
+        return "float32"
+
+    if mode == "onnx" and not onnx_attached:
+        return "int8"
+    return mode
+
+
+if __name__ == "__main__":
+    # Mevcut ayarları göster: python tts_cpu_inference.py <model_name> [voice_key]
+    if len(sys.argv) < 2:
+        print("Usage: python tts_cpu_inference.py <model_name> [voice_key]", file=sys.stderr)
+        sys.exit(1)
+    name = sys.argv[1]
+    key = sys.argv[2] if len(sys.argv) > 2 else "default"
+    print(json.dumps({
+        "cache_dir": get_cache_dir(name),
+        "mode": resolve_cpu_mode(name, key),
+        "voice_modes": load_voice_modes(name),
+    }, indent=2, ensure_ascii=False))
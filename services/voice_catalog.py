@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Voice Catalog Builder + Speaker Embedding Index
+main.py / xtts_v2_setup.py gibi tek tek dinleme örneği üretmek yerine TÜM sesleri kataloglar:
+  - VCTK (VITS) konuşmacıları: her biri için örnek cümle sentezi
+  - Klon anlatıcılar (voice_samples/*.wav): XTTS-v2 ile aynı cümlenin sentezi
+Sentez process pool'da yapılır (her worker modeli BIR KEZ yükler), güncel örnekler manifest ile atlanır
+Her ses için XTTS speaker embedding'i (512-d, L2 normalize) speaker_index.npz'ye yazılır
+Referans bir WAV'a benzeyen sesi bulmak tek bir matris çarpımıdır
+
+Kullanım:
+  python voice_catalog.py build [--only vctk|clones] [--speakers p230 p317] [--workers N] [--force]
+  python voice_catalog.py similar <ref.wav> [--top 5] [--kind vctk|clone]
+  python voice_catalog.py list
+"""
+import os
+import sys
+import io
+import json
+import glob
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from host_profile import get_cpu_threads, get_parallel_jobs
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+VOICE_SAMPLES_DIR = os.path.join(PROJECT_ROOT, "voice_samples")
+CATALOG_DIR = os.path.join(PROJECT_ROOT, "models", "voice_catalog")
+SAMPLES_DIR = os.path.join(CATALOG_DIR, "samples")
+MANIFEST_PATH = os.path.join(CATALOG_DIR, "manifest.json")
+INDEX_PATH = os.path.join(CATALOG_DIR, "speaker_index.npz")
+
+MODELS = {
+    "xtts": "tts_models/multilingual/multi-dataset/xtts_v2",
+    "vits": "tts_models/en/vctk/vits",
+}
+# host_calibration.py runner isimleri
+PROFILE_RUNNERS = {"xtts": "xtts", "vits": "coqui"}
+
+SAMPLE_TEXT = "Subscribe now, and do not miss out on the greatest discoveries in human history."
+
+_worker_tts = None
+
+
+def log(message):
+    print(f"[Voice Catalog] {message}", file=sys.stderr)
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# -------------------------
+# Worker süreçleri (model worker başına BIR KEZ yüklenir)
+# -------------------------
+def init_worker(model_key, threads):
+    global _worker_tts
+    import torch
+    torch.set_num_threads(threads)
+    from TTS.api import TTS
+    _worker_tts = TTS(model_name=MODELS[model_key], gpu=False)
+
+
+def worker_speakers():
+    return list(_worker_tts.speakers or [])
+
+
+def worker_synthesize(voice_id, output_path, text, speaker=None, speaker_wav=None, language=None):
+    """Örnek sentezi - önce .partial.wav'a, sonra atomik olarak yerine"""
+    root, ext = os.path.splitext(output_path)
+    tmp_path = f"{root}.partial{ext}"
+    kwargs = {"speaker": speaker} if speaker else {"speaker_wav": speaker_wav, "language": language}
+    _worker_tts.tts_to_file(text=text, file_path=tmp_path, **kwargs)
+    os.replace(tmp_path, output_path)
+    return voice_id
+
+
+def compute_embedding(tts, wav_path):
+    """XTTS-v2 speaker embedding (512-d), L2 normalize"""
+    _, speaker_embedding = tts.synthesizer.tts_model.get_conditioning_latents(audio_path=[wav_path])
+    vector = speaker_embedding.detach().cpu().numpy().astype(np.float32).reshape(-1)
+    return vector / max(float(np.linalg.norm(vector)), 1e-8)
+
+
+def worker_embed(voice_id, wav_path):
+    return voice_id, compute_embedding(_worker_tts, wav_path)
+
+
+def make_pool(model_key, workers):
+    """Worker sayısı ve thread'ler host profilinden (host_calibration.py), yoksa çekirdekler paylaştırılır"""
+    runner = PROFILE_RUNNERS[model_key]
+    workers = workers or get_parallel_jobs(runner, 1 if model_key == "xtts" else max(1, (os.cpu_count() or 2) // 2))
+    threads = get_cpu_threads(runner, max(1, (os.cpu_count() or 1) // workers))
+    log(f"{model_key}: {workers} worker(s) x {threads} thread(s)")
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_key, threads))
+
+
+# -------------------------
+# Katalog + index
+# -------------------------
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"voices": {}}
+    except Exception as e:
+        log(f"WARNING: Manifest unreadable, rebuilding: {e}")
+        return {"voices": {}}
+
+
+def load_index(path=INDEX_PATH):
+    """Returns: (ids, kinds, vectors [N, D] float32) - index yoksa boş"""
+    if not os.path.exists(path):
+        return [], [], np.zeros((0, 0), dtype=np.float32)
+    with np.load(path) as data:
+        return list(data["ids"]), list(data["kinds"]), data["vectors"].astype(np.float32)
+
+
+def save_index(ids, kinds, vectors, path=INDEX_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, ids=np.array(ids, dtype=str), kinds=np.array(kinds, dtype=str), vectors=vectors)
+    os.replace(tmp_path, path)
+
+
+def clone_references():
+    return sorted(
+        p for p in glob.glob(os.path.join(VOICE_SAMPLES_DIR, "*.wav"))
+        if ".partial." not in os.path.basename(p)
+    )
+
+
+def sample_is_current(entry, expected):
+    """Örnek dosyası var ve aynı model/metin/referans ile üretilmiş mi"""
+    if not entry or not os.path.exists(entry.get("sample", "")):
+        return False
+    if any(entry.get(key) != value for key, value in expected.items()):
+        return False
+    return entry.get("sample_signature") == file_signature(entry["sample"])
+
+
+def build(args):
+    os.makedirs(SAMPLES_DIR, exist_ok=True)
+    manifest = load_manifest()
+    voices = manifest["voices"]
+    text = args.text
+    clone_tasks = []
+
+    # 1) VCTK konuşmacıları (konuşmacı listesi de VITS worker'ından - ana süreç model yüklemez)
+    if args.only in (None, "vctk"):
+        with make_pool("vits", args.workers) as pool:
+            speakers = args.speakers or pool.submit(worker_speakers).result()
+            log(f"VCTK: {len(speakers)} speakers")
+            futures = {}
+            for speaker in speakers:
+                voice_id = f"vctk:{speaker}"
+                sample = os.path.join(SAMPLES_DIR, f"vctk_{speaker}.wav")
+                expected = {"model": MODELS["vits"], "text": text_hash(text)}
+                if not args.force and sample_is_current(voices.get(voice_id), expected):
+                    continue
+                voices[voice_id] = {"kind": "vctk", "speaker": speaker, "sample": sample, **expected}
+                futures[pool.submit(worker_synthesize, voice_id, sample, text, speaker=speaker)] = voice_id
+            synthesize_all(futures, voices, manifest)
+
+    # 2) Klon anlatıcılar + tüm embedding'ler (aynı XTTS worker'ları)
+    clone_ids = set()
+    if args.only in (None, "clones"):
+        for reference in clone_references():
+            name = os.path.splitext(os.path.basename(reference))[0]
+            voice_id = f"clone:{name}"
+            clone_ids.add(voice_id)
+            sample = os.path.join(SAMPLES_DIR, f"clone_{name}.wav")
+            expected = {
+                "model": MODELS["xtts"],
+                "text": text_hash(text),
+                "reference": reference,
+                "reference_signature": file_signature(reference),
+            }
+            if args.force or not sample_is_current(voices.get(voice_id), expected):
+                voices[voice_id] = {"kind": "clone", "sample": sample, **expected}
+                clone_tasks.append((voice_id, sample, reference))
+        # Silinen referansların girdileri kaldırılır
+        for voice_id in [v for v in voices if v.startswith("clone:") and v not in clone_ids]:
+            try:
+                os.remove(voices.pop(voice_id)["sample"])
+            except OSError:
+                pass
+
+    ids, kinds, vectors = load_index()
+    known = {voice_id: vectors[i] for i, voice_id in enumerate(ids)}
+
+    # Embedding kaynağı: klonlarda referansın kendisi (kimlik), VCTK'da sentezlenen örnek
+    def embedding_source(entry):
+        return entry["reference"] if entry["kind"] == "clone" else entry["sample"]
+
+    def stale_embeddings():
+        return [
+            voice_id for voice_id, entry in voices.items()
+            if entry.get("sample_signature") and (
+                args.force or voice_id not in known
+                or entry.get("embedding_signature") != file_signature(embedding_source(entry)))
+        ]
+
+    if clone_tasks or stale_embeddings():
+        with make_pool("xtts", args.workers) as pool:
+            futures = {
+                pool.submit(worker_synthesize, voice_id, sample, text, speaker_wav=reference, language=args.language): voice_id
+                for voice_id, sample, reference in clone_tasks
+            }
+            synthesize_all(futures, voices, manifest)
+
+            # Sentez sonrası: başarısız örnekler manifest'ten çıkmış, yeni örnekler eklenmiş olur
+            embed_futures = {
+                pool.submit(worker_embed, voice_id, embedding_source(voices[voice_id])): voice_id
+                for voice_id in stale_embeddings()
+            }
+            for future in as_completed(embed_futures):
+                voice_id = embed_futures[future]
+                try:
+                    _, vector = future.result()
+                except Exception as e:
+                    log(f"WARNING: {voice_id} embedding failed: {e}")
+                    continue
+                known[voice_id] = vector
+                voices[voice_id]["embedding_signature"] = file_signature(embedding_source(voices[voice_id]))
+
+    write_json_atomic(MANIFEST_PATH, manifest)
+    index_ids = sorted(v for v in known if v in voices)
+    if index_ids:
+        save_index(index_ids, [voices[v]["kind"] for v in index_ids], np.stack([known[v] for v in index_ids]))
+    log(f"Catalog: {len(voices)} voices, index: {len(index_ids)} embeddings -> {INDEX_PATH}")
+    print(json.dumps({"success": True, "voices": len(voices), "embeddings": len(index_ids), "index": INDEX_PATH}))
+
+
+def synthesize_all(futures, voices, manifest):
+    """Sentez sonuçlarını topla - her başarılı örnekten sonra manifest kaydedilir (kesilirse kaldığı yerden)"""
+    done = 0
+    for future in as_completed(futures):
+        voice_id = futures[future]
+        try:
+            future.result()
+        except Exception as e:
+            log(f"WARNING: {voice_id} synthesis failed: {e}")
+            voices.pop(voice_id, None)
+            continue
+        entry = voices[voice_id]
+        entry["sample_signature"] = file_signature(entry["sample"])
+        entry.pop("embedding_signature", None)
+        write_json_atomic(MANIFEST_PATH, manifest)
+        done += 1
+        log(f"[{done}/{len(futures)}] {voice_id}")
+
+
+def similar(args):
+    ids, kinds, vectors = load_index()
+    if not ids:
+        raise RuntimeError(f"Speaker index not found or empty: {INDEX_PATH} (run build first)")
+
+    from TTS.api import TTS
+    tts = TTS(model_name=MODELS["xtts"], gpu=False)
+    query = compute_embedding(tts, args.reference)
+
+    # Vektörler L2 normalize - kosinüs benzerliği = iç çarpım
+    scores = vectors @ query
+    if args.kind:
+        scores = np.where(np.array(kinds) == args.kind, scores, -np.inf)
+    order = np.argsort(-scores)[:args.top]
+    matches = [
+        {"voice": ids[i], "kind": kinds[i], "similarity": round(float(scores[i]), 4)}
+        for i in order if np.isfinite(scores[i])
+    ]
+    for match in matches:
+        log(f"{match['similarity']:.3f}  {match['voice']}")
+    print(json.dumps({"success": True, "reference": args.reference, "matches": matches}))
+
+
+def list_catalog(args):
+    voices = load_manifest()["voices"]
+    ids, _, _ = load_index()
+    indexed = set(ids)
+    for voice_id, entry in sorted(voices.items()):
+        print(f"{voice_id:<32}{entry['kind']:<8}{'embedded' if voice_id in indexed else '-':<10}{entry['sample']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel voice catalog builder with a speaker embedding index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="Synthesize missing/stale samples and update the embedding index")
+    build_parser.add_argument("--only", choices=["vctk", "clones"], default=None)
+    build_parser.add_argument("--speakers", nargs="+", default=None, help="VCTK speaker IDs (default: all)")
+    build_parser.add_argument("--workers", type=int, default=None, help="Default: host profile parallel_jobs")
+    build_parser.add_argument("--language", default="en", help="Language for cloned narrator samples")
+    build_parser.add_argument("--text", default=SAMPLE_TEXT)
+    build_parser.add_argument("--force", action="store_true", help="Re-synthesize and re-embed everything")
+
+    similar_parser = sub.add_parser("similar", help="Voices closest to a reference WAV")
+    similar_parser.add_argument("reference")
+    similar_parser.add_argument("--top", type=int, default=5)
+    similar_parser.add_argument("--kind", choices=["vctk", "clone"], default=None)
+
+    sub.add_parser("list", help="Show catalog entries")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "build":
+            build(args)
+        elif args.command == "similar":
+            similar(args)
+        else:
+            list_catalog(args)
+    except Exception as e:
+        log(f"ERROR: {e}")
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -442,6 +442,17 @@ class WhisperService {
         console.log(`🌍 [Faster-Whisper] Using Whisper auto-detection (no specific language markers found)`);
       }
       
+      // SCRIPT RECONCILIATION: Script'i dosyaya yaz, Python aynı çağrıda script-birebir zamanlamaları döndürsün
+      let scriptPath = null;
+      if (scriptText && typeof scriptText === 'string') {
+        scriptPath = path.join(path.dirname(audioPath), `${path.basename(audioPath, path.extname(audioPath))}_script_${Date.now()}.txt`);
+        try {
+          fs.writeFileSync(scriptPath, scriptText, 'utf8');
+        } catch (e) {
+          scriptPath = null;
+        }
+      }
+      
       return new Promise((resolve) => {
         // Run Faster-Whisper Python script
         const args = [
@@ -452,6 +463,9 @@ class WhisperService {
           computeType,
           whisperLanguage // Pass language parameter (None = auto-detect)
         ];
+        if (scriptPath) {
+          args.push(scriptPath);
+        }
 
         const whisperProcess = spawn(pythonCmd, args, {
           stdio: ['ignore', 'pipe', 'pipe'],
@@ -482,6 +496,9 @@ class WhisperService {
         whisperProcess.on('close', (code) => {
           // CRITICAL: Clear timeout when process completes
           clearTimeout(timeoutHandle);
+          if (scriptPath) {
+            try { fs.unlinkSync(scriptPath); } catch (e) {}
+          }
           
           if (code !== 0) {
             console.warn(`⚠️ [Faster-Whisper] Process exited with code ${code}`);
@@ -501,7 +518,7 @@ class WhisperService {
             }
 
             // Convert Faster-Whisper word-level timestamps to SRT
-            const srtContent = this.convertFasterWhisperToSRT(result.words, scriptText, audioDuration, videoFormat);
+            const srtContent = this.convertFasterWhisperToSRT(result.words, scriptText, audioDuration, videoFormat, result.aligned_words);
 
             if (srtContent) {
               console.log(`✅ [Faster-Whisper] Generated ${srtContent.split('\n\n').length} subtitle entries from ${result.words.length} words`);
@@ -531,8 +548,9 @@ class WhisperService {
    * @param {string} scriptText - Original script text (used for subtitle content)
    * @param {number} audioDuration - Total audio duration
    * @param {string} videoFormat - 'youtube' or 'shorts' - affects subtitle line length
+   * @param {Array} alignedWords - Script-exact timings from script_alignment.py (one per script word), optional
    */
-  convertFasterWhisperToSRT(words, scriptText, audioDuration, videoFormat = 'shorts') {
+  convertFasterWhisperToSRT(words, scriptText, audioDuration, videoFormat = 'shorts', alignedWords = null) {
     try {
       if (!words || words.length === 0) {
         return null;
@@ -563,7 +581,17 @@ class WhisperService {
       // Calculate the ratio between script words and Whisper words
       const ratio = scriptWords.length / words.length;
       
-      if (ratio <= 1.5 && ratio >= 0.67) {
+      if (alignedWords && alignedWords.length === scriptWords.length) {
+        // BEST: Python DP reconciliation - script-exact, monotonic timings
+        console.log(`✅ [Faster-Whisper] Using reconciled script timings (${alignedWords.filter(w => w.source === 'interpolated').length} interpolated) - HIGHEST QUALITY`);
+        alignedWords.forEach((aligned, i) => {
+          wordTimings.push({
+            word: scriptWords[i],
+            start: aligned.start,
+            end: aligned.end
+          });
+        });
+      } else if (ratio <= 1.5 && ratio >= 0.67) {
         // Similar word counts - use direct 1:1 mapping (best quality)
         console.log(`✅ [Faster-Whisper] Direct mapping (ratio: ${ratio.toFixed(2)}) - HIGH QUALITY`);
         for (let i = 0; i < scriptWords.length && i < words.length; i++) {
@@ -271,6 +271,65 @@ class XTTSTTS {
     return chunks;
   }
 
+  /**
+   * Token-aware chunk planlama (xtts_chunk_planner.py)
+   * XTTS tokenizer ile gerçek token sayısını ölçer, chunk'ları ~400 token ve dilin karakter limitine (en 250) yakın paketler
+   * Daha az chunk = daha az per-call overhead
+   * XTTS_TOKEN_CHUNKING=false ile devre dışı bırakılabilir
+   * @returns {Promise<string[]|null>} - Chunk metinleri veya null (fallback: splitTextIntoChunks)
+   */
+  async planChunksWithTokenizer(text, outputPath, language) {
+    if (process.env.XTTS_TOKEN_CHUNKING === 'false') {
+      return null;
+    }
+
+    const plannerPath = path.join(__dirname, "xtts_chunk_planner.py");
+    const textPath = outputPath.replace(".wav", "_plan_input.txt");
+    const args = [plannerPath, "plan", textPath, outputPath, language];
+    if (process.env.XTTS_MAX_TOKENS) {
+      args.push("--max-tokens", process.env.XTTS_MAX_TOKENS);
+    }
+    if (process.env.XTTS_MAX_CHARS) {
+      args.push("--max-chars", process.env.XTTS_MAX_CHARS);
+    }
+
+    try {
+      fs.writeFileSync(textPath, text, 'utf8');
+      const stdout = await new Promise((resolve, reject) => {
+        const plannerProcess = spawn(this.getPythonCommand(), args, {
+          shell: true,
+          env: { ...process.env, PYTHONUNBUFFERED: '1' }
+        });
+
+        let out = "";
+        let stderr = "";
+        plannerProcess.stdout.on("data", (data) => { out += data.toString(); });
+        plannerProcess.stderr.on("data", (data) => { stderr += data.toString(); });
+        plannerProcess.on("close", (code) => {
+          if (code !== 0) {
+            reject(new Error(`planner exited with code ${code}: ${stderr.slice(-300)}`));
+          } else {
+            resolve(out);
+          }
+        });
+        plannerProcess.on("error", reject);
+      });
+
+      const result = JSON.parse(stdout.trim().split('\n').pop());
+      if (!result.success || !result.chunks || result.chunks.length === 0) {
+        throw new Error(result.error || 'no chunks returned');
+      }
+
+      console.log(`🧮 [XTTS-v2] Token-aware plan: ${result.chunks.length} chunks (regex splitter: ${result.legacy_chunk_count}), max ${Math.max(...result.tokens)} tokens`);
+      return result.chunks;
+    } catch (error) {
+      console.warn(`⚠️ [XTTS-v2] Token-aware planning unavailable, using 200-char splitter: ${error.message}`);
+      return null;
+    } finally {
+      try { fs.unlinkSync(textPath); } catch (e) {}
+    }
+  }
+
   /**
    * Uzun metinler için chunk'lara böl ve birleştir
    * CRITICAL LIMIT: XTTS-v2 max 400 tokens (~250 chars), güvenli chunk size: 200 chars
@@ -279,7 +338,10 @@ class XTTSTTS {
   async generateLongSpeech(text, outputPath, options = {}) {
     // CRITICAL: Önce metni ön işleme (ellipsis → duraklamalar)
     const preprocessedText = this.preprocessTextForDramaticPauses(text);
-    const chunks = this.splitTextIntoChunks(preprocessedText, 200);
+    // TOKEN-AWARE: Gerçek XTTS token sayısıyla planla, başarısız olursa 200 karakterlik regex bölmeye dön
+    const language = options.language || process.env.XTTS_LANGUAGE || this.detectLanguage(preprocessedText);
+    const plannedChunks = await this.planChunksWithTokenizer(preprocessedText, outputPath, language);
+    const chunks = plannedChunks || this.splitTextIntoChunks(preprocessedText, 200);
     
     console.log(`📝 [XTTS-v2] Splitting long text into ${chunks.length} chunks...`);
     console.log(`🎬 [XTTS-v2] Text preprocessed for natural speech flow (optimized pauses)`);
@@ -319,91 +381,120 @@ class XTTSTTS {
     });
     
     // Write chunks to temporary JSON file
+    // RESUME: JSON + manifest retry'lar boyunca korunur - runner tamamlanmış chunk'ları doğrulayıp atlar
     const chunksJsonPath = outputPath.replace(".wav", "_chunks.json");
+    const manifestPath = chunksJsonPath.replace(/\.json$/, ".manifest.json");
+    const resultPath = chunksJsonPath.replace(/\.json$/, ".result.json");
+    const sidecarPaths = [chunksJsonPath, manifestPath, resultPath];
     fs.writeFileSync(chunksJsonPath, JSON.stringify(chunksData, null, 2), 'utf8');
     
+    // Sayı olmayan değer NaN olur ve "attempt >= NaN" hiç true olmaz (sonsuz retry) - varsayılana dön
+    const parsedRetries = parseInt(process.env.XTTS_BATCH_RETRIES || "2", 10);
+    const retries = Number.isFinite(parsedRetries) ? Math.max(0, parsedRetries) : 2;
+    
     try {
-      // Call batch Python runner
-      const batchRunnerPath = path.join(__dirname, "xtts_v2_batch_runner.py");
-      const pythonCmd = this.getPythonCommand();
-      
-      await new Promise((resolve, reject) => {
-        const args = [batchRunnerPath, chunksJsonPath, speakerWav, language];
-        const pythonProcess = spawn(pythonCmd, args, { 
-          shell: true,
-          env: { ...process.env, PYTHONUNBUFFERED: '1', USE_CUDA: process.env.USE_CUDA || 'true' }
-        });
-
-        let stderr = "";
-        let stdout = "";
+      for (let attempt = 0; ; attempt++) {
+        const { code, result, stderr } = await this.runBatchRunner(chunksJsonPath, resultPath, speakerWav, language);
         
-        pythonProcess.stdout.on("data", (data) => {
-          const output = data.toString().trim();
-          stdout += output + "\n";
-          console.log(`[XTTS-v2:PYTHON] ${output}`);
-        });
-
-        pythonProcess.stderr.on("data", (data) => {
-          const errOutput = data.toString().trim();
-          stderr += errOutput + "\n";
-          // FutureWarning'leri görmezden gel
-          if (!errOutput.includes('FutureWarning') && !errOutput.includes('weights_only')) {
-            console.error(`[XTTS-v2:ERROR] ${errOutput}`);
+        if (code === 0) {
+          // Verify all chunks were created
+          const missing = chunkPaths.filter(p => !fs.existsSync(p));
+          if (missing.length === 0) {
+            const resumed = result && result.skipped ? result.skipped.length : 0;
+            console.log(`✅ [XTTS-v2] All ${chunks.length} chunks generated successfully (batch mode${resumed ? `, ${resumed} resumed` : ''})`);
+            break;
           }
-        });
-
-        pythonProcess.on("close", (code) => {
-          // Clean up JSON file
-          try { fs.unlinkSync(chunksJsonPath); } catch (e) {}
-          
-          if (code !== 0) {
-            // ACCESS_VIOLATION (0xC0000005 = 3221225477) için özel mesaj
-            let errorMsg = `XTTS-v2 batch failed with code ${code}`;
-            if (code === 3221225477 || code === -1073741819) {
-              errorMsg = `XTTS-v2 crashed (ACCESS_VIOLATION). Possible causes:\n` +
-                `  1. GPU memory insufficient - try closing other apps\n` +
-                `  2. CUDA/PyTorch version mismatch\n` +
-                `  3. Model file corrupted - delete and re-download\n` +
-                `  Falling back to Coqui TTS...`;
-              console.error(`⚠️ ${errorMsg}`);
-            }
-            reject(new Error(`${errorMsg}\nStderr: ${stderr.slice(-500)}`));
-          } else {
-            // Verify all chunks were created
-            const allExist = chunkPaths.every(p => fs.existsSync(p));
-            if (allExist) {
-              console.log(`✅ [XTTS-v2] All ${chunks.length} chunks generated successfully (batch mode)`);
-              resolve();
-            } else {
-              const missing = chunkPaths.filter(p => !fs.existsSync(p));
-              reject(new Error(`XTTS-v2 batch completed but ${missing.length} output files not found`));
-            }
-          }
-        });
-
-        // Timeout - 5 dakika (XTTS yavaş olabilir)
-        pythonProcess.on("error", (err) => {
-          console.error(`[XTTS-v2:SPAWN_ERROR] ${err.message}`);
-          reject(new Error(`XTTS-v2 spawn error: ${err.message}`));
-        });
-      });
+          throw new Error(`XTTS-v2 batch completed but ${missing.length} output files not found`);
+        }
+        
+        // ACCESS_VIOLATION (0xC0000005 = 3221225477) için özel mesaj
+        let errorMsg = `XTTS-v2 batch failed with code ${code}`;
+        if (code === 3221225477 || code === -1073741819) {
+          errorMsg = `XTTS-v2 crashed (ACCESS_VIOLATION). Possible causes:\n` +
+            `  1. GPU memory insufficient - try closing other apps\n` +
+            `  2. CUDA/PyTorch version mismatch\n` +
+            `  3. Model file corrupted - delete and re-download\n` +
+            `  Falling back to Coqui TTS...`;
+          console.error(`⚠️ ${errorMsg}`);
+        } else if (code === 2 && result) {
+          // Kısmi sonuç: sadece başarısız chunk'lar tekrar denenecek
+          errorMsg = `XTTS-v2 batch partially failed: ${result.failed.length}/${result.total} chunks ` +
+            `(${result.failed.map(f => f.index + 1).join(', ')})`;
+        }
+        
+        // Fatal (exit 1) hatalar tekrar denemeyle düzelmez (eksik model, bozuk JSON vb.)
+        if (code === 1 || attempt >= retries) {
+          throw new Error(`${errorMsg}\nStderr: ${stderr.slice(-500)}`);
+        }
+        console.warn(`⚠️ [XTTS-v2] ${errorMsg} - retrying remaining chunks (attempt ${attempt + 2}/${retries + 1})...`);
+      }
 
       // FFmpeg ile chunk'ları birleştir
       await this.concatenateAudioFiles(chunkPaths, outputPath);
       
-      // Chunk dosyalarını temizle
+      // Chunk dosyalarını ve resume manifest'ini temizle
       chunkPaths.forEach((p) => fs.existsSync(p) && fs.unlinkSync(p));
+      sidecarPaths.forEach((p) => { try { fs.unlinkSync(p); } catch (e) {} });
 
       console.log("✅ [XTTS-v2] Long speech generated and concatenated successfully (batch mode)");
       return outputPath;
       
     } catch (error) {
       // Clean up on error
-      try { fs.unlinkSync(chunksJsonPath); } catch (e) {}
+      sidecarPaths.forEach((p) => { try { fs.unlinkSync(p); } catch (e) {} });
       chunkPaths.forEach((p) => { try { fs.unlinkSync(p); } catch (e) {} });
       throw error;
     }
   }
+
+  /**
+   * xtts_v2_batch_runner.py'yi bir kez çalıştır
+   * @returns {Promise<{code: number, result: Object|null, stderr: string}>}
+   *   code: 0 = tamam, 2 = kısmi (retry edilebilir), 1 = fatal; result: runner'ın result.json içeriği
+   */
+  runBatchRunner(chunksJsonPath, resultPath, speakerWav, language) {
+    const batchRunnerPath = path.join(__dirname, "xtts_v2_batch_runner.py");
+    const pythonCmd = this.getPythonCommand();
+    try { fs.unlinkSync(resultPath); } catch (e) {}
+    
+    return new Promise((resolve, reject) => {
+      const args = [batchRunnerPath, chunksJsonPath, speakerWav, language];
+      const pythonProcess = spawn(pythonCmd, args, { 
+        shell: true,
+        env: { ...process.env, PYTHONUNBUFFERED: '1', USE_CUDA: process.env.USE_CUDA || 'true' }
+      });
+
+      let stderr = "";
+      
+      pythonProcess.stdout.on("data", (data) => {
+        const output = data.toString().trim();
+        if (!output.startsWith("XTTS_BATCH_RESULT")) {
+          console.log(`[XTTS-v2:PYTHON] ${output}`);
+        }
+      });
+
+      pythonProcess.stderr.on("data", (data) => {
+        const errOutput = data.toString().trim();
+        stderr += errOutput + "\n";
+        // FutureWarning'leri görmezden gel
+        if (!errOutput.includes('FutureWarning') && !errOutput.includes('weights_only')) {
+          console.error(`[XTTS-v2:ERROR] ${errOutput}`);
+        }
+      });
+
+      pythonProcess.on("close", (code) => {
+        // Runner öldürüldüyse (OOM, timeout) result dosyası olmayabilir - manifest yine de ilerlemeyi tutar
+        let result = null;
+        try { result = JSON.parse(fs.readFileSync(resultPath, 'utf8')); } catch (e) {}
+        resolve({ code, result, stderr });
+      });
+
+      pythonProcess.on("error", (err) => {
+        console.error(`[XTTS-v2:SPAWN_ERROR] ${err.message}`);
+        reject(new Error(`XTTS-v2 spawn error: ${err.message}`));
+      });
+    });
+  }
   
   /**
    * Get Python command (venv or system)
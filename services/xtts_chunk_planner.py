@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+XTTS-v2 Token-Aware Chunk Planner
+xttsTTS.js'deki 200 karakterlik regex bölme yerine XTTS tokenizer'ı ile GERÇEK token sayısını ölçer
+Chunk'ları 400 token limitine yakın, doğal duraklama noktalarından (cümle > ; : — > virgül > boşluk) böler
+Token limiti tek başına yetmez: XTTS çıktıyı gpt_max_audio_tokens (~28 sn ses) ile keser ve tokenizer
+char_limits'in (en 250, tr 226) üstünde "audio truncation" uyarısı verir - chunk'lar bu karakter
+sınırıyla da kısıtlanır
+Tek başına sayılar ("10.") bir sonraki cümleyle birleştirilir (liste maddeleri için)
+Çıktı: xtts_v2_batch_runner.py'nin okuduğu chunks_json formatı
+
+Kullanım:
+  python xtts_chunk_planner.py plan <text_path> <output_wav> <language> [--max-tokens 380] [--max-chars N] [--chunks-json path]
+  python xtts_chunk_planner.py report [corpus.json|text.txt ...] [--max-tokens 380] [--max-chars N]
+"""
+import os
+import re
+import sys
+import io
+import json
+import argparse
+from functools import lru_cache
+
+# CRITICAL FIX: Force UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+XTTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+
+# XTTS gpt_max_text_tokens = 402 (dil etiketi + start/stop dahil), "max 400 tokens" uyarısı
+# Güvenli hedef: 380 token
+DEFAULT_MAX_TOKENS = 380
+# Tokenizer'da char_limits girdisi olmayan diller için (XTTS'in kendi varsayılanı)
+DEFAULT_CHAR_LIMIT = 250
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xtts_chunk_corpus.json")
+
+SENTENCE_PATTERN = re.compile(r"[^.!?]+[.!?]+|[^.!?]+$")
+STANDALONE_NUMBER = re.compile(r"^\s*\d+\.\s*$")
+
+# Cümle içi bölme noktaları - en doğal duraklamadan en zayıfa
+# Ayraç solda kalır, boşluk bir sonraki parçaya geçer (orijinal boşluklar korunur)
+BOUNDARY_PATTERNS = [
+    re.compile(r"(?<=[;:—–])(?=\s)"),
+    re.compile(r"(?<=,)(?=\s)"),
+    re.compile(r"(?=\s+\S)"),
+]
+
+
+def log(message):
+    print(f"[XTTS Chunk Planner] {message}", file=sys.stderr)
+
+
+def find_vocab_file():
+    """XTTS-v2 vocab.json - Coqui model klasöründen"""
+    from TTS.utils.generic_utils import get_user_data_dir
+    vocab_path = os.path.join(str(get_user_data_dir("tts")), XTTS_MODEL_NAME.replace("/", "--"), "vocab.json")
+    if not os.path.exists(vocab_path):
+        raise FileNotFoundError(f"XTTS-v2 vocab.json not found: {vocab_path} (run xtts_v2_setup.py first)")
+    return vocab_path
+
+
+class TokenCounter:
+    """XTTS VoiceBpeTokenizer ile token sayımı (aynı metin tekrar encode edilmez)"""
+
+    def __init__(self, language, vocab_path=None):
+        from TTS.tts.layers.xtts.tokenizer import VoiceBpeTokenizer
+        self.language = language
+        self.tokenizer = VoiceBpeTokenizer(vocab_file=vocab_path or find_vocab_file())
+        self.count = lru_cache(maxsize=4096)(self._count)
+
+    def _count(self, text):
+        return len(self.tokenizer.encode(text.strip(), self.language))
+
+    @property
+    def char_limit(self):
+        """Dilin ses kesilme sınırı (karakter) - XTTS bunun üstünde ~28 sn audio token limitine takılır"""
+        limits = getattr(self.tokenizer, "char_limits", {}) or {}
+        return limits.get(self.language.split("-")[0], limits.get(self.language, DEFAULT_CHAR_LIMIT))
+
+
+class ChunkBudget:
+    """Chunk sınırları: metin token limiti (assert 400) + karakter limiti (audio token / ~28 sn)"""
+
+    def __init__(self, counter, max_tokens=DEFAULT_MAX_TOKENS, max_chars=None):
+        self.counter = counter
+        self.max_tokens = max_tokens
+        self.max_chars = max_chars or counter.char_limit
+
+    def fits(self, text):
+        return len(text.strip()) <= self.max_chars and self.counter.count(text) <= self.max_tokens
+
+
+def split_sentences(text):
+    """
+    Cümlelere böl (orijinal boşluklar korunur)
+    CRITICAL: Tek başına sayıları (10., 9., 8.) bir sonraki cümleyle birleştir - xttsTTS.js ile aynı kural
+    """
+    sentences = [m.group(0) for m in SENTENCE_PATTERN.finditer(text) if m.group(0).strip()]
+    merged = []
+    i = 0
+    while i < len(sentences):
+        sentence = sentences[i]
+        if STANDALONE_NUMBER.match(sentence) and i < len(sentences) - 1:
+            sentence = sentence + sentences[i + 1]
+            i += 1
+        merged.append(sentence)
+        i += 1
+    return merged
+
+
+def split_at_boundary(text, level):
+    """Metni verilen seviyedeki ayraçlardan parçalara ayır"""
+    pieces = [p for p in BOUNDARY_PATTERNS[level].split(text) if p.strip()]
+    return pieces if len(pieces) > 1 else [text]
+
+
+def pack(units, budget, level=0):
+    """
+    Greedy paketleme: birimleri token VE karakter limiti dolana kadar birleştir
+    Tek başına limiti aşan birim bir alt seviyedeki ayraçlardan bölünür
+    """
+    chunks = []
+    current = ""
+    for unit in units:
+        candidate = current + unit
+        if budget.fits(candidate):
+            current = candidate
+            continue
+
+        if current.strip():
+            chunks.append(current.strip())
+        current = ""
+
+        if budget.fits(unit):
+            current = unit
+        elif level < len(BOUNDARY_PATTERNS):
+            sub_chunks = pack(split_at_boundary(unit, level), budget, level + 1)
+            # Son parça açık kalır - sonraki birimlerle birleşebilir
+            chunks.extend(sub_chunks[:-1])
+            current = sub_chunks[-1] if sub_chunks else ""
+        else:
+            # Tek kelime bile limiti aşıyor - olduğu gibi bırak (XTTS uyarı verir)
+            log(f"WARNING: Unsplittable segment over {budget.max_tokens} tokens / {budget.max_chars} chars: {unit[:40]!r}")
+            chunks.append(unit.strip())
+
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def plan_chunks(text, counter, max_tokens=DEFAULT_MAX_TOKENS, max_chars=None):
+    """Metni token/karakter limitine yakın, doğal sınırlardan bölünmüş chunk'lara ayır"""
+    return pack(split_sentences(text), ChunkBudget(counter, max_tokens, max_chars))
+
+
+def legacy_split(text, max_length=200):
+    """xttsTTS.js splitTextIntoChunks'ın birebir karşılığı (rapor karşılaştırması için)"""
+    sentences = re.findall(r"[^.!?]+[.!?]+", text) or [text]
+    chunks = []
+    current = ""
+    i = 0
+    while i < len(sentences):
+        sentence = sentences[i]
+        if re.match(r"^\s*\d+\.\s*$", sentence) and i < len(sentences) - 1:
+            sentence = sentence.strip() + " " + sentences[i + 1]
+            i += 1
+
+        if len(sentence.strip()) > max_length:
+            if current:
+                chunks.append(current.strip())
+                current = ""
+            parts = sentence.split(",")
+            temp = ""
+            for j, part in enumerate(parts):
+                part = part + ("," if j < len(parts) - 1 else "")
+                if len(temp + " " + part) > max_length:
+                    if temp:
+                        chunks.append(temp.strip())
+                    temp = part
+                else:
+                    temp += (" " if temp else "") + part
+            if temp.strip():
+                chunks.append(temp.strip())
+            i += 1
+            continue
+
+        if len(current + " " + sentence) > max_length:
+            if current:
+                chunks.append(current.strip())
+            current = sentence
+        else:
+            current += (" " if current else "") + sentence
+        i += 1
+
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def build_chunks_json(chunks, output_wav, counter):
+    """xtts_v2_batch_runner.py formatı - chunk yolları xttsTTS.js ile aynı isimlendirme"""
+    root, ext = os.path.splitext(output_wav)
+    return [
+        {"text": chunk, "output_path": f"{root}_chunk_{i}{ext}", "tokens": counter.count(chunk)}
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def load_corpus(paths):
+    """Corpus: .json ([{name, language, text}] listesi veya {"script": ...} video içeriği) ya da düz metin"""
+    documents = []
+    for path in paths:
+        name = os.path.basename(path)
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and "script" in data:
+                documents.append((name, data.get("language", "en"), data["script"]))
+            elif isinstance(data, list):
+                documents.extend((f"{name}#{d.get('name', i)}", d.get("language", "en"), d["text"])
+                                 for i, d in enumerate(data))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                documents.append((name, None, f.read()))
+    return documents
+
+
+def command_plan(args):
+    with open(args.text_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    counter = TokenCounter(args.language, args.vocab)
+    chunks = plan_chunks(text, counter, args.max_tokens, args.max_chars)
+    chunks_data = build_chunks_json(chunks, args.output_wav, counter)
+
+    chunks_json_path = args.chunks_json or os.path.splitext(args.output_wav)[0] + "_chunks.json"
+    with open(chunks_json_path, "w", encoding="utf-8") as f:
+        json.dump(chunks_data, f, indent=2, ensure_ascii=False)
+
+    legacy_count = len(legacy_split(text))
+    log(f"{len(chunks)} chunks (legacy 200-char splitter: {legacy_count}), max tokens: "
+        f"{max((c['tokens'] for c in chunks_data), default=0)}/{args.max_tokens}, max chars: "
+        f"{max((len(c['text']) for c in chunks_data), default=0)}/{args.max_chars or counter.char_limit}")
+
+    print(json.dumps({
+        "success": True,
+        "chunks_json": chunks_json_path,
+        "chunks": [c["text"] for c in chunks_data],
+        "tokens": [c["tokens"] for c in chunks_data],
+        "legacy_chunk_count": legacy_count,
+    }, ensure_ascii=False))
+
+
+def command_report(args):
+    documents = load_corpus(args.corpus or [DEFAULT_CORPUS])
+    counters = {}
+    total_legacy = 0
+    total_planned = 0
+
+    print(f"{'Document':<40}{'Chars':>7}{'Legacy':>8}{'Planned':>9}{'Reduction':>11}{'MaxTok':>8}{'MaxChr':>8}{'Limit':>7}")
+    print("-" * 98)
+    for name, language, text in documents:
+        language = language or args.language
+        if language not in counters:
+            counters[language] = TokenCounter(language, args.vocab)
+        counter = counters[language]
+
+        legacy = legacy_split(text)
+        planned = plan_chunks(text, counter, args.max_tokens, args.max_chars)
+        max_tokens = max((counter.count(c) for c in planned), default=0)
+        max_chars = max((len(c) for c in planned), default=0)
+        reduction = 1.0 - len(planned) / max(len(legacy), 1)
+        total_legacy += len(legacy)
+        total_planned += len(planned)
+        print(f"{name[:39]:<40}{len(text):>7}{len(legacy):>8}{len(planned):>9}{reduction:>10.0%}"
+              f"{max_tokens:>8}{max_chars:>8}{args.max_chars or counter.char_limit:>7}")
+
+    print("-" * 98)
+    total_reduction = 1.0 - total_planned / max(total_legacy, 1)
+    print(f"{'TOTAL':<47}{total_legacy:>8}{total_planned:>9}{total_reduction:>10.0%}")
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    common.add_argument("--max-chars", type=int, default=None,
+                        help="Per-chunk character cap (default: XTTS tokenizer char_limits for the language)")
+    common.add_argument("--vocab", default=None, help="XTTS-v2 vocab.json (default: Coqui model folder)")
+
+    parser = argparse.ArgumentParser(description="Token-aware XTTS-v2 chunk planner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", parents=[common], help="Write chunks_json for xtts_v2_batch_runner.py")
+    plan.add_argument("text_path")
+    plan.add_argument("output_wav")
+    plan.add_argument("language")
+    plan.add_argument("--chunks-json", default=None)
+
+    report = sub.add_parser("report", parents=[common], help="Chunk-count reduction vs. the 200-char splitter")
+    report.add_argument("corpus", nargs="*", help=f"Corpus files (default: {os.path.basename(DEFAULT_CORPUS)})")
+    report.add_argument("--language", default="en", help="Language for plain text files")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "plan":
+            command_plan(args)
+        else:
+            command_report(args)
+    except Exception as e:
+        log(f"ERROR: {e}")
+        if args.command == "plan":
+            print(json.dumps({"success": False, "error": str(e), "chunks": []}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,31 @@
 XTTS-v2 Batch Voice Cloning Runner
 Bu script XTTS-v2 modelini BIR KEZ yükler ve birden fazla chunk'ı işler
 PERFORMANS OPTIMIZASYONU: Model yükleme overhead'i ~4x azalır
+
+RESUME: Her chunk önce <isim>.partial.wav'a yazılır, sonra atomik olarak yerine taşınır
+İlerleme <chunks_json>.manifest.json'da tutulur - aynı iş tekrar çalıştırılırsa
+doğrulanan (boyut + sha1) chunk'lar atlanır, sadece eksik/başarısız olanlar üretilir
+Sonuç: stdout'ta "XTTS_BATCH_RESULT {json}" satırı + <chunks_json>.result.json
+Exit code: 0 = tüm chunk'lar hazır, 2 = kısmi (bazı chunk'lar başarısız), 1 = fatal hata
 """
 import sys
 import os
 import io
 import json
 import gc
+import hashlib
 
 # CRITICAL FIX: Force UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+XTTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+
+MANIFEST_VERSION = 1
+RESULT_PREFIX = "XTTS_BATCH_RESULT"
+EXIT_PARTIAL = 2
+
 def cleanup_memory():
     """Bellek temizleme - GPU ve RAM"""
     gc.collect()
@@ -43,6 +56,73 @@ def check_cuda_availability():
         print(f"[XTTS-v2 Batch] CUDA check error: {e}")
         return False
 
+def sha1_text(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def sha1_file(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def job_hash(chunks_data, speaker_wav, language):
+    """Aynı iş = aynı metinler + aynı referans ses + aynı dil + aynı model"""
+    job = {
+        "model": XTTS_MODEL_NAME,
+        "language": language,
+        "speaker": sha1_file(speaker_wav),
+        "texts": [chunk['text'] for chunk in chunks_data],
+    }
+    return sha1_text(json.dumps(job, sort_keys=True, ensure_ascii=False))
+
+def sidecar_path(chunks_json_path, suffix):
+    return os.path.splitext(chunks_json_path)[0] + suffix
+
+def partial_path(output_path):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.partial{ext}"
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_manifest(manifest_path, job):
+    """Aynı işin manifest'i - farklı iş veya okunamayan dosya ise boş manifest"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and manifest.get("job") == job:
+            return manifest
+        print("[XTTS-v2 Batch] Manifest belongs to a different job, starting fresh")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[XTTS-v2 Batch] WARNING: Manifest unreadable, starting fresh: {e}")
+    return {"version": MANIFEST_VERSION, "job": job, "chunks": {}}
+
+def chunk_is_complete(manifest, index, chunk_info):
+    """Manifest kaydı + diskteki dosya birebir eşleşiyor mu (boyut, sha1, metin)"""
+    entry = manifest["chunks"].get(str(index))
+    output_path = chunk_info['output_path']
+    if not entry or entry.get("text_sha1") != sha1_text(chunk_info['text']):
+        return False
+    if entry.get("output_path") != output_path or not os.path.exists(output_path):
+        return False
+    if os.path.getsize(output_path) != entry.get("size"):
+        return False
+    return sha1_file(output_path) == entry.get("sha1")
+
+def report_result(result_path, result):
+    """Makine tarafından okunabilir sonuç: tek stdout satırı + result dosyası"""
+    try:
+        write_json_atomic(result_path, result)
+    except Exception as e:
+        print(f"[XTTS-v2 Batch] WARNING: Could not write result file: {e}", file=sys.stderr)
+    print(f"{RESULT_PREFIX} {json.dumps(result, ensure_ascii=False)}", flush=True)
+
 def main():
     # Argüman kontrolü: chunks_json_path speaker_wav language
     if len(sys.argv) < 4:
@@ -53,23 +133,58 @@ def main():
     speaker_wav = sys.argv[2]
     language = sys.argv[3]
     
+    result_path = sidecar_path(chunks_json_path, ".result.json")
+    manifest_path = sidecar_path(chunks_json_path, ".manifest.json")
+    result = {
+        "success": False,
+        "total": 0,
+        "completed": [],
+        "skipped": [],
+        "failed": [],
+        "manifest": manifest_path,
+        "error": None,
+    }
+
+    def fatal(message):
+        print(f"[XTTS-v2 Batch] ERROR: {message}", file=sys.stderr)
+        result["error"] = message
+        report_result(result_path, result)
+        sys.exit(1)
+
     # Load chunks from JSON file
     try:
         with open(chunks_json_path, 'r', encoding='utf-8') as f:
             chunks_data = json.load(f)
     except Exception as e:
-        print(f"[XTTS-v2 Batch] ERROR: Failed to load chunks JSON: {e}", file=sys.stderr)
-        sys.exit(1)
+        fatal(f"Failed to load chunks JSON: {e}")
     
     num_chunks = len(chunks_data)
+    result["total"] = num_chunks
     print(f"[XTTS-v2 Batch] Starting batch voice cloning for {num_chunks} chunks...")
     print(f"   Speaker WAV: {os.path.basename(speaker_wav)}")
     print(f"   Language: {language}")
     
     # Speaker WAV dosyasının varlığını kontrol et
     if not os.path.exists(speaker_wav):
-        print(f"[XTTS-v2 Batch] ERROR: Speaker WAV file not found: {speaker_wav}", file=sys.stderr)
-        sys.exit(1)
+        fatal(f"Speaker WAV file not found: {speaker_wav}")
+    
+    # RESUME: Önceki denemede doğrulanmış chunk'ları atla
+    manifest = load_manifest(manifest_path, job_hash(chunks_data, speaker_wav, language))
+    pending = []
+    for i, chunk_info in enumerate(chunks_data):
+        if chunk_is_complete(manifest, i, chunk_info):
+            result["skipped"].append(i)
+        else:
+            manifest["chunks"].pop(str(i), None)
+            pending.append(i)
+    if result["skipped"]:
+        print(f"[XTTS-v2 Batch] Resuming: {len(result['skipped'])}/{num_chunks} chunks already complete")
+    
+    if not pending:
+        print(f"[XTTS-v2 Batch] All {num_chunks} chunks already complete, nothing to do")
+        result["success"] = True
+        report_result(result_path, result)
+        return
     
     try:
         # CRITICAL: Önce belleği temizle
@@ -78,6 +193,10 @@ def main():
         # CUDA durumunu kontrol et
         cuda_actually_available = check_cuda_availability()
         
+        # HOST PROFILE: Kalibre edilmiş thread ayarları (host_calibration.py) - model yüklenmeden önce
+        from host_profile import apply_torch_threads
+        apply_torch_threads("xtts")
+        
         # TTS library'yi import et
         from TTS.api import TTS
         
@@ -95,74 +214,97 @@ def main():
         
         # Model yükleme - hata durumunda CPU'ya fallback
         try:
-            tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=use_gpu)
+            tts = TTS(model_name=XTTS_MODEL_NAME, gpu=use_gpu)
         except Exception as model_error:
             if use_gpu:
                 print(f"[XTTS-v2 Batch] GPU model load failed: {model_error}")
                 print("[XTTS-v2 Batch] Retrying with CPU...")
                 cleanup_memory()
-                tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=False)
+                tts = TTS(model_name=XTTS_MODEL_NAME, gpu=False)
                 use_gpu = False
             else:
                 raise model_error
         
         print(f"[XTTS-v2 Batch] Model loaded successfully (GPU: {use_gpu})")
-        print(f"[XTTS-v2 Batch] Processing {num_chunks} chunks with SINGLE model instance...")
-        
-        # Process each chunk
-        success_count = 0
-        for i, chunk_info in enumerate(chunks_data):
-            text = chunk_info['text']
-            output_path = chunk_info['output_path']
-            
-            print(f"\n[XTTS-v2 Batch] Chunk {i+1}/{num_chunks}:")
-            print(f"   Text length: {len(text)} characters")
-            print(f"   Output: {os.path.basename(output_path)}")
-            
-            try:
-                # Generate speech (model already loaded!)
-                tts.tts_to_file(
-                    text=text,
-                    speaker_wav=speaker_wav,
-                    language=language,
-                    file_path=output_path,
-                    split_sentences=False  # CRITICAL: Disable internal splitting
-                )
-                
-                # Verify output
-                if os.path.exists(output_path):
-                    file_size = os.path.getsize(output_path)
-                    print(f"   SUCCESS: {file_size} bytes")
-                    success_count += 1
-                else:
-                    print(f"   ERROR: Output file not created", file=sys.stderr)
-                    
-            except Exception as e:
-                print(f"   ERROR: {str(e)}", file=sys.stderr)
-                import traceback
-                traceback.print_exc()
-            
-            # Her chunk sonrası bellek temizle (GPU memory leak önleme)
-            if i < num_chunks - 1:  # Son chunk'tan sonra gerek yok
-                gc.collect()
         
-        print(f"\n[XTTS-v2 Batch] Batch processing complete: {success_count}/{num_chunks} chunks successful")
-        
-        # Final cleanup
-        cleanup_memory()
-        
-        if success_count < num_chunks:
-            sys.exit(1)
-            
+        # CPU-ONLY: int8 / ONNX çıkarım modu (TTS_CPU_INFERENCE veya ses başına benchmark önerisi)
+        if not use_gpu:
+            from tts_cpu_inference import resolve_cpu_mode, apply_cpu_mode, voice_key
+            cpu_mode = resolve_cpu_mode(XTTS_MODEL_NAME, voice_key(speaker_wav=speaker_wav))
+            cpu_mode = apply_cpu_mode(tts, XTTS_MODEL_NAME, cpu_mode)
+            print(f"[XTTS-v2 Batch] CPU inference mode: {cpu_mode}")
+        print(f"[XTTS-v2 Batch] Processing {len(pending)} chunks with SINGLE model instance...")
+    
     except ImportError as e:
-        print(f"[XTTS-v2 Batch] ERROR: TTS library not found. Please install: pip install TTS", file=sys.stderr)
         print(f"   Details: {str(e)}", file=sys.stderr)
-        sys.exit(1)
+        fatal("TTS library not found. Please install: pip install TTS")
     except Exception as e:
-        print(f"[XTTS-v2 Batch] ERROR: {str(e)}", file=sys.stderr)
         import traceback
         traceback.print_exc()
-        sys.exit(1)
+        fatal(str(e))
+    
+    # Process each pending chunk
+    for n, i in enumerate(pending):
+        chunk_info = chunks_data[i]
+        text = chunk_info['text']
+        output_path = chunk_info['output_path']
+        tmp_path = partial_path(output_path)
+        
+        print(f"\n[XTTS-v2 Batch] Chunk {i+1}/{num_chunks}:")
+        print(f"   Text length: {len(text)} characters")
+        print(f"   Output: {os.path.basename(output_path)}")
+        
+        try:
+            # Generate speech (model already loaded!) - yarım kalan yazım asla output_path'te görünmez
+            tts.tts_to_file(
+                text=text,
+                speaker_wav=speaker_wav,
+                language=language,
+                file_path=tmp_path,
+                split_sentences=False  # CRITICAL: Disable internal splitting
+            )
+            
+            # Verify output
+            if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) <= 44:
+                raise RuntimeError("Output file not created or empty")
+            os.replace(tmp_path, output_path)
+            
+            file_size = os.path.getsize(output_path)
+            manifest["chunks"][str(i)] = {
+                "output_path": output_path,
+                "text_sha1": sha1_text(text),
+                "size": file_size,
+                "sha1": sha1_file(output_path),
+            }
+            write_json_atomic(manifest_path, manifest)
+            result["completed"].append(i)
+            print(f"   SUCCESS: {file_size} bytes")
+                
+        except Exception as e:
+            print(f"   ERROR: {str(e)}", file=sys.stderr)
+            import traceback
+            traceback.print_exc()
+            result["failed"].append({"index": i, "output_path": output_path, "error": str(e)})
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        
+        # Her chunk sonrası bellek temizle (GPU memory leak önleme)
+        if n < len(pending) - 1:  # Son chunk'tan sonra gerek yok
+            gc.collect()
+    
+    done_count = len(result["completed"]) + len(result["skipped"])
+    print(f"\n[XTTS-v2 Batch] Batch processing complete: {done_count}/{num_chunks} chunks successful "
+          f"({len(result['skipped'])} resumed)")
+    
+    # Final cleanup
+    cleanup_memory()
+    
+    result["success"] = not result["failed"]
+    report_result(result_path, result)
+    if result["failed"]:
+        sys.exit(EXIT_PARTIAL)
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,8 @@
 XTTS-v2 Voice Cloning Runner
 Bu script XTTS-v2 modelini kullanarak ses klonlama yapar
 Node.js'den çağrılır ve WAV çıktısı üretir
+output_path *.pcm.json ise ses WAV yerine paylaşılan belleğe yayınlanır (pcm_handoff.py) -
+faster_whisper_transcribe.py doğrudan bu tanımlayıcıyı okur, nihai WAV "pcm_handoff.py export" ile yazılır
 """
 import sys
 import os
@@ -15,6 +17,8 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+XTTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+
 def cleanup_memory():
     """Bellek temizleme - GPU ve RAM"""
     gc.collect()
@@ -68,6 +72,10 @@ def main():
         # CUDA durumunu kontrol et
         cuda_actually_available = check_cuda_availability()
         
+        # HOST PROFILE: Kalibre edilmiş thread ayarları (host_calibration.py) - model yüklenmeden önce
+        from host_profile import apply_torch_threads
+        apply_torch_threads("xtts")
+        
         # TTS library'yi import et
         from TTS.api import TTS
         
@@ -83,19 +91,26 @@ def main():
         
         # Model yükleme - hata durumunda CPU'ya fallback
         try:
-            tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=use_gpu)
+            tts = TTS(model_name=XTTS_MODEL_NAME, gpu=use_gpu)
         except Exception as model_error:
             if use_gpu:
                 print(f"[XTTS-v2] GPU model load failed: {model_error}")
                 print("[XTTS-v2] Retrying with CPU...")
                 cleanup_memory()
-                tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=False)
+                tts = TTS(model_name=XTTS_MODEL_NAME, gpu=False)
                 use_gpu = False
             else:
                 raise model_error
         
         print(f"[XTTS-v2] Model loaded (GPU: {use_gpu})")
         
+        # CPU-ONLY: int8 / ONNX çıkarım modu (TTS_CPU_INFERENCE veya ses başına benchmark önerisi)
+        if not use_gpu:
+            from tts_cpu_inference import resolve_cpu_mode, apply_cpu_mode, voice_key
+            cpu_mode = resolve_cpu_mode(XTTS_MODEL_NAME, voice_key(speaker_wav=speaker_wav))
+            cpu_mode = apply_cpu_mode(tts, XTTS_MODEL_NAME, cpu_mode)
+            print(f"[XTTS-v2] CPU inference mode: {cpu_mode}")
+        
         # Ses klonlama ile üret
         print("[XTTS-v2] Generating speech with voice cloning...")
         
@@ -103,13 +118,27 @@ def main():
         # XTTS'in kendi sentence splitter'ı sayıları ("10.", "9.") ayrı cümleler olarak algılıyor
         # Bu yüzden "Wanda D", "DAven", "Yeah", "Warrior" gibi random kelimeler üretiyor
         # split_sentences=False ile text'i olduğu gibi kullan
-        tts.tts_to_file(
-            text=text,
-            speaker_wav=speaker_wav,
-            language=language,
-            file_path=output_path,
-            split_sentences=False  # CRITICAL: Sentence splitting'i devre dışı bırak!
-        )
+        from pcm_handoff import is_descriptor_path, publish
+        if is_descriptor_path(output_path):
+            # PCM HANDOFF: WAV encode yok - float32 buffer + sample rate tanımlayıcısı
+            wav = tts.tts(
+                text=text,
+                speaker_wav=speaker_wav,
+                language=language,
+                split_sentences=False
+            )
+            sample_rate = tts.synthesizer.output_sample_rate
+            descriptor = publish(wav, sample_rate, descriptor_path=output_path)
+            print(f"[XTTS-v2] PCM handoff: {descriptor['backend']} {descriptor['name']} "
+                  f"({descriptor['samples'] / sample_rate:.2f}s @ {sample_rate} Hz)")
+        else:
+            tts.tts_to_file(
+                text=text,
+                speaker_wav=speaker_wav,
+                language=language,
+                file_path=output_path,
+                split_sentences=False  # CRITICAL: Sentence splitting'i devre dışı bırak!
+            )
         
         # Çıktı dosyasının oluşturulduğunu kontrol et
         if os.path.exists(output_path):